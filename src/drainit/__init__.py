@@ -1,9 +1,25 @@
+import importlib
 import importlib.metadata
 
 __version__ = importlib.metadata.version("culvert-toolkit")
 
-from .workflows import (
-    NaaccDataIngest,
-    RainfallDataGetter,
-    CulvertCapacity,
-)
\ No newline at end of file
+# The workflows (and everything they depend on) are imported on first use, 
+# so that importing the package itself stays fast.
+_LAZY_IMPORTS = {
+    "NaaccDataIngest": "workflows",
+    "RainfallDataGetter": "workflows",
+    "CulvertCapacity": "workflows",
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        module = importlib.import_module(f".{_LAZY_IMPORTS[name]}", __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
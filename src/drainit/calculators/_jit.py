@@ -0,0 +1,55 @@
+"""Optional JIT compilation for the calculators.
+
+If numba is installed (``pip install culvert-toolkit[speedups]``), the numeric
+kernels in the calculators are compiled with ``numba.njit``; otherwise the
+decorators here leave them as plain Python functions, which give the same
+results.
+
+numba itself takes a few tenths of a second to import, so it isn't imported
+until a kernel is first called; importing the calculators (or the models,
+which use their dataclasses) doesn't pay for it. On that first call the
+kernel is compiled and replaces the placeholder in its module, so later calls
+go straight to the compiled code.
+
+Kernels are compiled with ``cache=True``, so compilation only happens the
+first time a kernel is used after install (or after its source changes);
+later processes load the compiled code from disk. Numba writes the cache to
+``__pycache__`` next to the source, or to a per-user cache directory if the
+package directory isn't writable (as with a system-wide ArcGIS Pro
+install). Set the ``NUMBA_CACHE_DIR`` environment variable to choose the
+location explicitly.
+"""
+
+from functools import wraps
+from importlib.util import find_spec
+
+NUMBA_AVAILABLE = find_spec('numba') is not None
+
+
+def njit(*args, **kwargs):
+    """stand-in for numba.njit that defers importing numba and compiling the
+    kernel until it's first called. Works both bare (``@njit``) and with
+    options (``@njit(cache=True)``). Without numba, the function is returned
+    as-is.
+    """
+    def decorate(func):
+        if not NUMBA_AVAILABLE:
+            return func
+
+        kernel = None
+
+        @wraps(func)
+        def compile_on_first_call(*call_args, **call_kwargs):
+            nonlocal kernel
+            if kernel is None:
+                from numba import njit as numba_njit
+                kernel = numba_njit(**kwargs)(func)
+                # rebind the module-level name to the compiled kernel
+                func.__globals__[func.__name__] = kernel
+            return kernel(*call_args, **call_kwargs)
+
+        return compile_on_first_call
+
+    if len(args) == 1 and callable(args[0]) and not kwargs:
+        return decorate(args[0])
+    return decorate
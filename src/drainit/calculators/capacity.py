@@ -1,13 +1,12 @@
 import math
-from typing import Optional, Union
+from math import sqrt
+from typing import Optional, Union, List
 from dataclasses import dataclass, field, fields
 from marshmallow import EXCLUDE
 from marshmallow_dataclass import class_schema
-import pint
+import numpy
 
-from ..utils import get_type
-
-units = pint.UnitRegistry()
+from ..utils import get_type, DATACLASS_SLOTS
 
 
 def calc_culvert_capacity(
@@ -48,13 +47,72 @@ def calc_culvert_capacity(
     :rtype: float
     """
     
-    # Calculate and return the capacity for the culvert
+    # Skip calculation if inputs are outside the domain of the equation 
+    # (zero denominators, negative radicand) or are missing
+    if not culvert_depth_m or not coefficient_c or not si_conv_factor:
+        return None
     try:
-        capacity = (culvert_area_sqm * math.sqrt(culvert_depth_m * ((head_over_invert / culvert_depth_m) - coefficient_y - coefficient_slope * slope_rr) / coefficient_c)) / si_conv_factor
-        # print("capacity", capacity)
-        return capacity
-    except:
+        radicand = culvert_depth_m * ((head_over_invert / culvert_depth_m) - coefficient_y - coefficient_slope * slope_rr) / coefficient_c
+        if radicand < 0.0:
+            return None
+        # Calculate and return the capacity for the culvert
+        # (math's sqrt on scalars; numpy.sqrt is only for the batch version)
+        capacity = (culvert_area_sqm * sqrt(radicand)) / si_conv_factor
+    except TypeError: # missing (None) inputs
         return None
+    # print("capacity", capacity)
+    return capacity
+
+
+def calc_culvert_capacity_batch(
+    culvert_area_sqm, 
+    head_over_invert, 
+    culvert_depth_m, 
+    slope_rr, 
+    coefficient_slope=-0.5, 
+    coefficient_y=-0.04,
+    coefficient_c=0.7, 
+    si_conv_factor=1.811
+    ) -> numpy.ndarray:
+    """Compute capacity for many culverts at once. Same equation as 
+    calc_culvert_capacity, but each parameter may be an array (or a list) of 
+    length N, or a scalar that applies to all culverts.
+
+    Where the scalar calculator would fail (missing inputs, a zero depth, or 
+    a negative radicand), the result is NaN instead of None.
+
+    :param culvert_area_sqm: internal surface area of the culverts
+    :type culvert_area_sqm: array-like
+    :param head_over_invert: Hydraulic head above the culvert inverts, meters
+    :type head_over_invert: array-like
+    :param culvert_depth_m: Culvert depths, meters
+    :type culvert_depth_m: array-like
+    :param slope_rr: slopes, rise/run (meters)
+    :type slope_rr: array-like
+    :param coefficient_slope: slope coefficients, defaults to -0.5
+    :type coefficient_slope: array-like or float
+    :param coefficient_y: shape and material coefficients
+    :type coefficient_y: array-like or float
+    :param coefficient_c: shape and material coefficients
+    :type coefficient_c: array-like or float
+    :param si_conv_factor: adjustment factor for units (SI=1.811), defaults to 1.811
+    :type si_conv_factor: float, optional
+    :return: culvert capacities, in cubic meters / second (m^3/s)
+    :rtype: numpy.ndarray
+    """
+
+    # None values become NaN
+    a, h, d, s, ks, y, c = [
+        numpy.asarray(v, dtype=numpy.float64) 
+        for v in (culvert_area_sqm, head_over_invert, culvert_depth_m, slope_rr, coefficient_slope, coefficient_y, coefficient_c)
+    ]
+
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        radicand = d * ((h / d) - y - ks * s) / c
+        valid = numpy.isfinite(radicand) & (radicand >= 0)
+        capacity = (a * numpy.sqrt(numpy.where(valid, radicand, numpy.nan))) / si_conv_factor
+
+    return numpy.atleast_1d(capacity)
 
 
 def req_field(): 
@@ -62,7 +120,7 @@ def req_field():
     """
     return field(metadata=dict(required=True))
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class Capacity:
     """Model for culvert capacity. Includes parameters both crosswalked and 
     derived from the NAACC data required for the culvert capacity calculation.
@@ -144,8 +202,81 @@ class Capacity:
         )
         return self.culvert_capacity
 
+
 CapacitySchema = class_schema(Capacity)
 
-# helper that creates a lookup of numeric fields, used during crosswalking + validation
-CAPACITY_FIELDS_AND_DEFAULTS = [(f.name, f.default) for f in fields(Capacity)]
-CAPACITY_NUMERIC_FIELDS = {f.name: get_type(f.type) for f in fields(Capacity) if get_type(f.type) in [int, float]}
\ No newline at end of file
+# helpers that list fields and numeric fields (as (name, type) pairs), used 
+# during crosswalking + validation. Built once, as immutable sequences/sets.
+CAPACITY_FIELDS_AND_DEFAULTS = tuple((f.name, f.default) for f in fields(Capacity))
+CAPACITY_FIELD_NAMES = frozenset(f.name for f in fields(Capacity))
+_CAPACITY_FIELD_TYPES = tuple((f.name, get_type(f.type)) for f in fields(Capacity))
+CAPACITY_NUMERIC_FIELDS = tuple((n, t) for n, t in _CAPACITY_FIELD_TYPES if t in (int, float))
+CAPACITY_NUMERIC_NAMES = frozenset(n for n, _ in CAPACITY_NUMERIC_FIELDS)
+
+
+class CapacityArray:
+    """Column-oriented (struct-of-arrays) view of a list of Capacity objects:
+    one float64 NumPy array per numeric Capacity field, with None stored as 
+    NaN. Used to calculate capacity for many culverts at once.
+    """
+
+    __slots__ = tuple(n for n, _ in CAPACITY_NUMERIC_FIELDS)
+
+    def __init__(self, capacities: List[Capacity]):
+        for name in self.__slots__:
+            setattr(
+                self, 
+                name, 
+                numpy.fromiter(
+                    (numpy.nan if getattr(c, name) is None else getattr(c, name) for c in capacities),
+                    dtype=numpy.float64,
+                    count=len(capacities)
+                )
+            )
+
+    def __len__(self):
+        return len(self.culvert_capacity)
+
+    def calculate(self, si_conv_factor=1.811) -> numpy.ndarray:
+        """calculate culvert capacity for all culverts. Equivalent to 
+        Capacity.calculate, with NaN where capacity can't be calculated.
+        """
+        self.culvert_capacity = calc_culvert_capacity_batch(
+            culvert_area_sqm=self.culvert_area_sqm,
+            head_over_invert=self.head_over_invert,
+            culvert_depth_m=self.culvert_depth_m,
+            slope_rr=self.slope_rr,
+            coefficient_slope=self.coefficient_slope,
+            coefficient_y=self.coefficient_y,
+            coefficient_c=self.coefficient_c,
+            si_conv_factor=si_conv_factor
+        )
+        return self.culvert_capacity
+
+    def scatter_back(self, capacities: List[Capacity], field_names=('culvert_capacity',)) -> List[Capacity]:
+        """write column values back to the Capacity objects (in the same 
+        order they were provided), with NaN written as None.
+        """
+        for name in field_names:
+            for c, v in zip(capacities, getattr(self, name).tolist()):
+                setattr(c, name, None if math.isnan(v) else v)
+        return capacities
+
+
+def calculate_capacities(capacities: List[Capacity], si_conv_factor=1.811) -> List[Capacity]:
+    """calculate culvert capacity for a list of Capacity objects in one pass, 
+    setting culvert_capacity on each (None where it can't be calculated). 
+    Equivalent to calling Capacity.calculate on each one.
+
+    :param capacities: list of Capacity objects
+    :type capacities: List[Capacity]
+    :param si_conv_factor: adjustment factor for units (SI=1.811), defaults to 1.811
+    :type si_conv_factor: float, optional
+    :return: the same list of Capacity objects
+    :rtype: List[Capacity]
+    """
+    if not capacities:
+        return capacities
+    capacity_array = CapacityArray(capacities)
+    capacity_array.calculate(si_conv_factor)
+    return capacity_array.scatter_back(capacities)
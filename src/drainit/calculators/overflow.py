@@ -1,6 +1,13 @@
 from dataclasses import dataclass
 from typing import Optional, Any, List
+import numpy
 from ..config import FREQUENCIES
+from ..utils import DATACLASS_SLOTS
+
+# FREQUENCIES as a (read-only) numeric array, so the default doesn't need to
+# be converted on every call
+FREQUENCIES_ARRAY = numpy.asarray(FREQUENCIES, dtype=numpy.float64)
+FREQUENCIES_ARRAY.setflags(write=False)
  
 
 def culvert_overflow_calculator(culvert_capacity, peak_flow):
@@ -15,28 +22,80 @@ def culvert_overflow_calculator(culvert_capacity, peak_flow):
     except:
         return None
 
+def overflow_batch(culvert_capacities, peak_flows) -> numpy.ndarray:
+    """Vectorized version of culvert_overflow_calculator, for many culverts 
+    and frequencies at once. Capacity is broadcast across each culvert's 
+    frequencies. Where either input is missing (NaN), overflow is NaN.
+
+    Args:
+        culvert_capacities (numpy.ndarray): culvert capacities, shape (n_culverts,)
+        peak_flows (numpy.ndarray): peak flows, shape (n_culverts, n_frequencies)
+
+    Returns:
+        numpy.ndarray: overflows, shape (n_culverts, n_frequencies)
+    """
+    culvert_capacities = numpy.asarray(culvert_capacities, dtype=numpy.float64)
+    peak_flows = numpy.asarray(peak_flows, dtype=numpy.float64)
+    return culvert_capacities[:, numpy.newaxis] - peak_flows
+
+def _frequencies_as_array(list_of_frequencies) -> numpy.ndarray:
+    if list_of_frequencies is FREQUENCIES:
+        return FREQUENCIES_ARRAY
+    # frequencies may be provided as numeric strings (e.g., "100")
+    return numpy.asarray(list_of_frequencies, dtype=numpy.float64)
+
 def max_return_calculator(list_of_overflows:List[float], list_of_frequencies: List[Any]=FREQUENCIES):
     """Given a list of calculated overflows and corresponding list of frequencies,
     return the highest frequency with >= 0 overflow.
 
+    Frequencies are compared numerically, so they may be numbers or numeric
+    strings.
+
+    Args:
+        list_of_overflows (List[float]): overflows, one per frequency. None 
+            values (not calculated) are ignored.
+        list_of_frequencies (List[int], optional): storm frequencies (return
+            periods). Defaults to FREQUENCIES.
+
+    Returns:
+        [float]: the highest frequency handled, or 0 if none are.
+    """
+    freqs = _frequencies_as_array(list_of_frequencies)
+    ovfs = numpy.fromiter(
+        (numpy.nan if ovf is None else ovf for ovf in list_of_overflows),
+        dtype=numpy.float64,
+        count=len(list_of_overflows)
+    )
+    # pairs up overflows and frequencies the way zip() would
+    n = min(len(ovfs), len(freqs))
+    handled = ovfs[:n] >= 0
+    if not handled.any():
+        return 0
+    return freqs[:n][handled].max().item()
+
+def max_return_calculator_batch(overflows, list_of_frequencies: List[Any]=FREQUENCIES) -> numpy.ndarray:
+    """Vectorized version of max_return_calculator, for many culverts at once.
+
     Args:
-        list_of_overflows (List[float]): [description]
-        list_of_frequencies (List[int], optional): [description]. Defaults to FREQUENCIES.
+        overflows (numpy.ndarray): 2-D array of overflows with one row per 
+            culvert and one column per frequency. NaN values (not 
+            calculated) are ignored.
+        list_of_frequencies (List[int], optional): storm frequencies (return
+            periods), one per column. Defaults to FREQUENCIES.
 
     Returns:
-        [int]: [description]
+        numpy.ndarray: the highest frequency handled by each culvert, or 0 
+            where none are.
     """
-    handled_return_periods = []
-    for freq, ovf in zip(list_of_frequencies, list_of_overflows):
-        if ovf is not None:
-            if ovf >= 0: 
-                handled_return_periods.append(freq)
-    if len(handled_return_periods) > 0:
-        return max(handled_return_periods)
-    return 0
+    freqs = _frequencies_as_array(list_of_frequencies)
+    overflows = numpy.atleast_2d(numpy.asarray(overflows, dtype=numpy.float64))
+    n = min(overflows.shape[1], len(freqs))
+    handled = overflows[:, :n] >= 0
+    max_returns = numpy.where(handled, freqs[:n], -numpy.inf).max(axis=1, initial=-numpy.inf)
+    return numpy.where(handled.any(axis=1), max_returns, 0)
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class Overflow:
 
     culvert_overflow_m3s: Optional[float] = None
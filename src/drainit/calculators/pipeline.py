@@ -0,0 +1,67 @@
+"""Runs the peak flow, overflow, and max return period calculators together,
+for many culverts and rainfall frequencies in one pass.
+"""
+
+from typing import Tuple, List, Any, Optional
+# dependencies
+import numpy
+
+from .runoff import peak_flow_calculator_batch
+from .overflow import overflow_batch, max_return_calculator_batch
+
+
+def evaluate(
+    culvert_capacity,
+    avg_rainfall_cm,
+    basin_area_sqkm,
+    avg_cn,
+    tc_hr=None,
+    mean_slope_pct=None,
+    max_flow_length_m=None,
+    frequencies: Optional[List[Any]]=None
+    ) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, Optional[numpy.ndarray]]:
+    """Evaluate culverts against rainfall: peak flow at each culvert for each
+    rainfall frequency, the resulting overflow (capacity - peak flow), and
+    optionally the highest frequency each culvert handles.
+
+    Rainfall is provided as a 2-D array with one row per culvert and one
+    column per frequency (NaN-padded where culverts have fewer frequencies);
+    everything else has one value per culvert. Missing values are NaN in the
+    results. See `runoff.peak_flow_calculator_batch` for how time of
+    concentration is derived where it isn't provided.
+
+    :param culvert_capacity: capacity of each culvert, in cubic meters / second; shape (n_culverts,)
+    :type culvert_capacity: numpy.ndarray
+    :param avg_rainfall_cm: rainfall for a 24 hour event, in centimeters; shape (n_culverts, n_frequencies)
+    :type avg_rainfall_cm: numpy.ndarray
+    :param basin_area_sqkm: area of each culvert's basin, in square kilometers; shape (n_culverts,)
+    :type basin_area_sqkm: numpy.ndarray
+    :param avg_cn: average curve number of each basin; shape (n_culverts,)
+    :type avg_cn: numpy.ndarray
+    :param tc_hr: time of concentration for each basin; shape (n_culverts,), optional
+    :type tc_hr: numpy.ndarray
+    :param mean_slope_pct: average slope in each basin, as percent rise; shape (n_culverts,), optional
+    :type mean_slope_pct: numpy.ndarray
+    :param max_flow_length_m: maximum flow length of each basin, in meters; shape (n_culverts,), optional
+    :type max_flow_length_m: numpy.ndarray
+    :param frequencies: storm frequencies for the rainfall columns. If provided, the max return period is calculated; defaults to None
+    :type frequencies: List[Any], optional
+    :return: a tuple of peak flow (n_culverts, n_frequencies), time of concentration (n_culverts,), overflow (n_culverts, n_frequencies), and max return period (n_culverts,) or None
+    :rtype: tuple
+    """
+
+    peak_flow, tc_hr = peak_flow_calculator_batch(
+        avg_rainfall_cm=avg_rainfall_cm,
+        basin_area_sqkm=basin_area_sqkm,
+        avg_cn=avg_cn,
+        tc_hr=tc_hr,
+        mean_slope_pct=mean_slope_pct,
+        max_flow_length_m=max_flow_length_m
+    )
+    overflow = overflow_batch(culvert_capacity, peak_flow)
+
+    max_return_period = None
+    if frequencies is not None:
+        max_return_period = max_return_calculator_batch(overflow, frequencies)
+
+    return peak_flow, tc_hr, overflow, max_return_period
@@ -1,13 +1,21 @@
 import math
-from collections import OrderedDict
 from typing import Tuple
 # dependencies
 import numpy
 import math
-import pint
 from dataclasses import dataclass
 
-units = pint.UnitRegistry()
+from ._jit import njit
+from ..utils import DATACLASS_SLOTS
+
+# Constants for the Tc-based q_u adjustment used by rain ratio method 2 and
+# the precip table calculator, one per storm frequency (1 through 500-year).
+# The relationship was found by Jo Archibald 2019. Read-only, since they're
+# shared by every call.
+QU_CONST0 = numpy.array([2.798, 2.798, 3.225, 3.529, 3.932, 4.244, 4.57, 4.914, 5.403], dtype=numpy.float64)
+QU_CONST1 = numpy.array([0.367, 0.367, 0.481, 0.559, 0.658, 0.733, 0.81, 0.888, 0.996], dtype=numpy.float64)
+QU_CONST0.setflags(write=False)
+QU_CONST1.setflags(write=False)
 
 def time_of_concentration_calculator(
     max_flow_length, #units of meters
@@ -28,9 +36,39 @@ def time_of_concentration_calculator(
     Outputs:
         tc_hr: time of concentration (hourly)
     """
-    if not mean_slope_pct:
-        mean_slope_pct = 0.00001
-    tc_hr = const_a * math.pow(max_flow_length, const_b) * math.pow((mean_slope_pct / 100), const_c)
+    mean_slope_pct = mean_slope_pct or 0.00001
+    tc_hr = const_a * (max_flow_length ** const_b) * ((mean_slope_pct / 100) ** const_c)
+    return tc_hr
+
+def time_of_concentration_calculator_batch(
+    max_flow_length, #units of meters
+    mean_slope_pct, # percent slope
+    const_a=0.000325,
+    const_b=0.77,
+    const_c=-0.385
+    ) -> numpy.ndarray:
+    """
+    calculate time of concentration (hourly) for many catchments at once. 
+    Vectorized version of time_of_concentration_calculator.
+
+    Inputs:
+        - max_flow_length: maximum flow length of each catchment area (array)
+        - mean_slope: average percent slope of each catchment area (array).
+            Missing or 0 slopes are treated the same way as in 
+            time_of_concentration_calculator.
+
+    Outputs:
+        tc_hr: time of concentration (hourly), as an array
+    """
+    max_flow_length = numpy.asarray(max_flow_length, dtype=float)
+    mean_slope_pct = numpy.asarray(mean_slope_pct, dtype=float)
+    mean_slope_pct = numpy.where(
+        (mean_slope_pct == 0) | numpy.isnan(mean_slope_pct), 
+        0.00001, 
+        mean_slope_pct
+    )
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        tc_hr = const_a * numpy.power(max_flow_length, const_b) * numpy.power((mean_slope_pct / 100), const_c)
     return tc_hr
 
 def time_of_concentration_calculator_simple(
@@ -45,7 +83,7 @@ def time_of_concentration_calculator_simple(
     Thhis equation is from Cornell's v2.1 ArcMap Field Calculator-based model implementation
     
     """
-    return const_a * math.pow(max_flow_length, const_b) * math.pow( ((max_elevation - min_elevation) / max_flow_length), const_c)
+    return const_a * (max_flow_length ** const_b) * (((max_elevation - min_elevation) / max_flow_length) ** const_c)
 
 def peak_flow_calculator_via_precip_table(
     catchment_area_sqkm,
@@ -53,7 +91,7 @@ def peak_flow_calculator_via_precip_table(
     avg_cn,
     precip_table,
     init_abstraction=0.2
-    ) -> OrderedDict:
+    ) -> dict:
     """Calculate peak runoff statistics at a "pour point" (e.g., a stormwater
     inlet, a culvert, or otherwise a basin's outlet of some sort) using
     parameters dervied from prior analysis of that pour point's catchment 
@@ -84,12 +122,12 @@ def peak_flow_calculator_via_precip_table(
         storm events by frequency
     """
 
-    # ensure that the precip_table maintains its ordering
-    precip_table = OrderedDict(precip_table)
+    # dicts maintain insertion order, so the header and values line up
+    precip_table = dict(precip_table)
 
     # extract the header and values from the precip table
     qp_header = list(precip_table.keys())
-    P = numpy.array(precip_table.values()) #values in P must be in cm
+    P = numpy.fromiter(precip_table.values(), dtype=numpy.float64, count=len(precip_table)) #values in P must be in cm
     
     # Skip calculation altogether for these conditions
     # if curve number or time of concentration are 0.
@@ -100,7 +138,7 @@ def peak_flow_calculator_via_precip_table(
     ]):
         if avg_cn in [0,'',None] or tc_hr in [0,'',None]:
             qp_data = [0 for i in range(0,len(qp_header))]
-            return OrderedDict(zip(qp_header, qp_data))
+            return dict(zip(qp_header, qp_data))
 
     # calculate storage, S in cm
     Storage = 0.1 * ((25400.0 / avg_cn) - 254.0) #cm
@@ -111,7 +149,7 @@ def peak_flow_calculator_via_precip_table(
     # calculate depth of runoff from each storm
     # if P < Ia NO runoff is produced
     Pe = (P - Ia)
-    Pe = numpy.array([0 if i < 0 else i for i in Pe]) # get rid of negative Pe's
+    Pe = numpy.maximum(Pe, 0.0) # get rid of negative Pe's
     Q = (Pe**2) / (P + (Storage - Ia)) # cm
     
     # calculate q_peak, cubic meters per second
@@ -120,12 +158,8 @@ def peak_flow_calculator_via_precip_table(
     # Note - the relationship for return interval = 1 year is derived from 2-year information
     # the 1-year results were unreliable from USGS data-derived P-3 curves
 
-    # keep rain ratio within limits set by TR55
-    Const0 = numpy.array([2.798, 2.798, 3.225, 3.529, 3.932, 4.244, 4.57, 4.914, 5.403])
-    Const1 = numpy.array([0.367, 0.367, 0.481, 0.559, 0.658, 0.733, 0.81, 0.888, 0.996])
-
-    qu = (Const0 - Const1 * tc_hr) / 8.64
-    qu = numpy.array([0.14 if i < 0.14 else i for i in qu]) # prevents peak flow being less than 1.2x daily flow
+    qu = (QU_CONST0 - QU_CONST1 * tc_hr) / 8.64
+    qu = numpy.maximum(qu, 0.14) # prevents peak flow being less than 1.2x daily flow
     # qu would have to be m^3/s per km^2 per cm :
     # / 8.64 creates those units from a unitless value
     #qu has weird units which take care of the difference between Q in cm and area in km2
@@ -134,7 +168,7 @@ def peak_flow_calculator_via_precip_table(
     # Q_daily = Q * catchment_area_sqkm *10000/(3600*24)   # updated 6/3/2019 for cms units
     
     # zip up the results with the header
-    results = OrderedDict(zip(qp_header,q_peak))
+    results = dict(zip(qp_header, q_peak.tolist()))
 
     return results
 
@@ -155,7 +189,7 @@ def qpeak_via_rain_ratio_method1(
     # We are using rainfall Type II because that is applicable to most of New York State
     # rain_ratio is a vector with one element per input return period
     rain_ratio = init_abstraction / avg_rainfall_cm
-    rain_ratio = [.1 if i < .1 else .5 if i > .5 else i for i in [rain_ratio]][0] # keep rain ratio within limits set by TR55
+    rain_ratio = numpy.clip(rain_ratio, .1, .5) # keep rain ratio within limits set by TR55
     
     CONST_0 = (rain_ratio**2) * -2.2349 + (rain_ratio * 0.4759) + 2.5273
     CONST_1 = (rain_ratio**2) * 1.5555 - (rain_ratio * 0.7081) - 0.5584
@@ -163,20 +197,48 @@ def qpeak_via_rain_ratio_method1(
 
     # qu has weird units which take care of the difference between Q in cm and area in km2 
     # qu is in m^3 s^-1 km^-2 cm^-1
-    qu = 10 ** (CONST_0 + CONST_1 * numpy.log10(tc_hr) + CONST_2 *  (numpy.log10(tc_hr))**2 - 2.366)
+    log_tc = numpy.log10(tc_hr) # (depends only on tc, so calculated once)
+    qu = 10 ** (CONST_0 + CONST_1 * log_tc + CONST_2 * log_tc**2 - 2.366)
     q_peak = Q * qu * basin_area_sqkm # m^3 s^-1
 
     return q_peak
 
+@njit(cache=True)
+def _peak_flow_via_rain_ratio_method1(avg_rainfall_cm, basin_area_sqkm, avg_cn, tc_hr):
+    """numeric kernel for peak_flow_calculator's default path: runoff depth 
+    followed by qpeak_via_rain_ratio_method1, for a single rainfall frequency.
+    Returns NaN where rainfall doesn't exceed the initial abstraction, or 
+    where there's no time of concentration (as numpy.log10 would).
+    """
+    if not tc_hr > 0:
+        return math.nan
+    storage = 0.1 * ((25400.0 / avg_cn) - 254.0)
+    init_abstraction = 0.2 * storage
+    Pe = avg_rainfall_cm - init_abstraction
+    if Pe < 0:
+        return math.nan
+    Q = (Pe**2) / (avg_rainfall_cm + (storage - init_abstraction))
+
+    rain_ratio = init_abstraction / avg_rainfall_cm
+    rain_ratio = min(max(rain_ratio, .1), .5) # keep rain ratio within limits set by TR55
+    CONST_0 = (rain_ratio**2) * -2.2349 + (rain_ratio * 0.4759) + 2.5273
+    CONST_1 = (rain_ratio**2) * 1.5555 - (rain_ratio * 0.7081) - 0.5584
+    CONST_2 = (rain_ratio**2) * 0.6041 + (rain_ratio * 0.0437) - 0.1761
+    log_tc = math.log10(tc_hr)
+    qu = 10 ** (CONST_0 + CONST_1 * log_tc + CONST_2 * log_tc**2 - 2.366)
+    return Q * qu * basin_area_sqkm
+
 def qpeak_via_rain_ratio_method2(
     tc_hr, 
     Q,
     basin_area_sqkm,
-    const0_values=[2.798, 2.798, 3.225, 3.529, 3.932, 4.244, 4.57, 4.914, 5.403],
-    const1_values=[0.367, 0.367, 0.481, 0.559, 0.658, 0.733, 0.81, 0.888, 0.996]
+    const0_values=None,
+    const1_values=None
     ) -> float:
     """Rain Ratio: Method 2 from Cornell (v2.1).
     Works for exactly 9 rainfall frequencies: the 1 through 500-year storms.
+    tc_hr, Q, and basin_area_sqkm may also be arrays with one row per basin 
+    (e.g., tc_hr and basin_area_sqkm as (n, 1) column vectors, Q as (n, 9)).
     """
 
     #calculate q_peak, cubic meters per second
@@ -185,12 +247,12 @@ def qpeak_via_rain_ratio_method2(
     # Note - the relationship for return interval = 1 year is derived from 2-year information
     # the 1-year results were unreliable from USGS data-derived P-3 curves
 
-    # keep rain ratio within limits set by TR55
-    Const0 = numpy.array(const0_values)
-    Const1 = numpy.array(const1_values)
+    # constants default to QU_CONST0 and QU_CONST1
+    Const0 = QU_CONST0 if const0_values is None else numpy.asarray(const0_values, dtype=numpy.float64)
+    Const1 = QU_CONST1 if const1_values is None else numpy.asarray(const1_values, dtype=numpy.float64)
 
     qu = (Const0 - Const1 * tc_hr) / 8.64
-    qu = numpy.array([0.14 if i < 0.14 else i for i in qu]) # prevents peak flow being less than 1.2x daily flow
+    qu = numpy.maximum(qu, 0.14) # prevents peak flow being less than 1.2x daily flow
     # qu would have to be m^3/s per km^2 per cm :
     # / 8.64 creates those units from a unitless value
 
@@ -258,7 +320,6 @@ def peak_flow_calculator(
     if avg_cn in [0,'',None]:
         return q_peak, tc_hr
 
-
     # -------------------------------------------
     # STORAGE 
     
@@ -278,6 +339,17 @@ def peak_flow_calculator(
     if Pe < 0:
         return q_peak, tc_hr
 
+    # the default method runs as a single (compiled, where available) kernel.
+    # (it returns NaN where there's no time of concentration)
+    if rain_ratio_method == 2:
+        q_peak = _peak_flow_via_rain_ratio_method1(
+            float(avg_rainfall_cm), 
+            float(basin_area_sqkm), 
+            float(avg_cn), 
+            float(tc_hr)
+        )
+        return q_peak, tc_hr
+
     Q = (Pe**2) / (avg_rainfall_cm + (storage - init_abstraction))
     # print("Q", Q)
     
@@ -286,15 +358,96 @@ def peak_flow_calculator(
     # alternative approaches from Cornell
     # calculate q_peak
 
-    if rain_ratio_method == 2:
-        q_peak = qpeak_via_rain_ratio_method1(init_abstraction, avg_rainfall_cm, tc_hr, Q, basin_area_sqkm)
-    else:
-        q_peak = qpeak_via_rain_ratio_method2(tc_hr, Q, basin_area_sqkm)
+    q_peak = qpeak_via_rain_ratio_method2(tc_hr, Q, basin_area_sqkm)
 
     return q_peak, tc_hr
 
+def peak_flow_calculator_batch(
+    avg_rainfall_cm,
+    basin_area_sqkm,
+    avg_cn,
+    tc_hr=None,
+    mean_slope_pct=None,
+    max_flow_length_m=None,
+    rain_ratio_method=2
+    ) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """Vectorized version of `peak_flow_calculator`, for calculating peak flow 
+    for many basins and rainfall frequencies in one pass. Rainfall is provided
+    as a 2-D array with one row per basin and one column per frequency; the
+    basin parameters are 1-D, with one value per basin, and are broadcast 
+    across the frequencies.
+
+    As with `peak_flow_calculator`, time of concentration is calculated from 
+    slope and flow length for any basin where it isn't provided (0, None, or 
+    NaN). Peak flow is NaN where `peak_flow_calculator` wouldn't calculate it, 
+    i.e., where the curve number is 0 or missing, or where rainfall doesn't 
+    exceed the initial abstraction.
+
+    :param avg_rainfall_cm: rainfall for a 24 hour event, in centimeters; shape (n_basins, n_frequencies)
+    :type avg_rainfall_cm: numpy.ndarray
+    :param basin_area_sqkm: area of each basin, in square kilometers; shape (n_basins,)
+    :type basin_area_sqkm: numpy.ndarray
+    :param avg_cn: average curve number of each basin; shape (n_basins,)
+    :type avg_cn: numpy.ndarray
+    :param tc_hr: time of concentration for each basin; shape (n_basins,), optional
+    :type tc_hr: numpy.ndarray
+    :param mean_slope_pct: average slope in each basin, as percent rise; shape (n_basins,), optional
+    :type mean_slope_pct: numpy.ndarray
+    :param max_flow_length_m: maximum flow length of each basin, in meters; shape (n_basins,), optional
+    :type max_flow_length_m: numpy.ndarray
+    :param rain_ratio_method: flag [1,2] to indicate method to use for calculating the rain ratio
+    :type rain_ratio_method: int
+    :return: a tuple of peak flow, in cubic meters / second, shape (n_basins, n_frequencies), and time of concentration, in hours, shape (n_basins,)
+    :rtype: tuple[numpy.ndarray, numpy.ndarray]
+    """
+    P = numpy.atleast_2d(numpy.asarray(avg_rainfall_cm, dtype=float))
+    n_basins = P.shape[0]
+    basin_area_sqkm = numpy.asarray(basin_area_sqkm, dtype=float)[:, numpy.newaxis]
+    avg_cn = numpy.asarray(avg_cn, dtype=float)[:, numpy.newaxis]
+
+    # -------------------------------------------
+    # TIME OF CONCENTRATION
+    # calculated only where it isn't provided
+
+    if tc_hr is None:
+        tc_hr = numpy.full(n_basins, numpy.nan)
+    tc_hr = numpy.asarray(tc_hr, dtype=float)
+    missing_tc = (tc_hr == 0) | numpy.isnan(tc_hr)
+    if missing_tc.any():
+        if max_flow_length_m is None:
+            max_flow_length_m = numpy.full(n_basins, numpy.nan)
+        if mean_slope_pct is None:
+            mean_slope_pct = numpy.full(n_basins, numpy.nan)
+        tc_hr = numpy.where(
+            missing_tc,
+            time_of_concentration_calculator_batch(max_flow_length_m, mean_slope_pct),
+            tc_hr
+        )
 
-@dataclass
+    # -------------------------------------------
+    # PEAK FLOW
+
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        # storage and initial abstraction depend only on the curve number, 
+        # so they're calculated once per basin (cm) and broadcast across the 
+        # frequencies
+        storage = 0.1 * ((25400.0 / avg_cn) - 254.0)
+        init_abstraction = 0.2 * storage
+        retention = storage - init_abstraction
+        # runoff depth, per basin and frequency (cm)
+        Pe = P - init_abstraction
+        Q = (Pe**2) / (P + retention)
+        if rain_ratio_method == 2:
+            q_peak = qpeak_via_rain_ratio_method1(init_abstraction, P, tc_hr[:, numpy.newaxis], Q, basin_area_sqkm)
+        else:
+            q_peak = qpeak_via_rain_ratio_method2(tc_hr[:, numpy.newaxis], Q, basin_area_sqkm)
+
+    # mask out the results peak_flow_calculator would skip
+    skip = (avg_cn == 0) | numpy.isnan(avg_cn) | (Pe < 0)
+    return numpy.where(skip, numpy.nan, q_peak), tc_hr
+
+
+@dataclass(**DATACLASS_SLOTS)
 class Runoff:
 
     time_of_concentration_hr: float = None
@@ -8,6 +8,16 @@ __alias__ = 'CulvertToolkit'
 from arcpy.geoprocessing._base import gptooldoc, gp, gp_fixargs
 from arcpy.arcobjects.arcobjectconversion import convertArcObjectToPythonObject
 
+# Bound geoprocessor tools, looked up on first use. They can't be bound at
+# import time, since gp only exposes them once the toolbox has been loaded.
+_GP_TOOLS = {}
+
+def _gp_tool(name):
+    tool = _GP_TOOLS.get(name)
+    if tool is None:
+        tool = _GP_TOOLS[name] = getattr(gp, name)
+    return tool
+
 # Tools
 @gptooldoc('CulvertCapacityPytTool_CulvertToolkit', None)
 def CulvertCapacityPytTool(points_filepath=None, raster_flowdir_filepath=None, raster_flowlen_filepath=None, raster_slope_filepath=None, raster_curvenumber_filepath=None, precip_src_config_filepath=None, output_points_filepath=None):
@@ -45,13 +55,7 @@ def CulvertCapacityPytTool(points_filepath=None, raster_flowdir_filepath=None, r
           polygon feature class containing the delineated watersheds of the
           culverts will be saved along with the point feature. It's name will be
           based on the name of the point feature class, suffixed with  "_sheds"."""
-    from arcpy.geoprocessing._base import gp, gp_fixargs
-    from arcpy.arcobjects.arcobjectconversion import convertArcObjectToPythonObject
-    try:
-        retval = convertArcObjectToPythonObject(gp.CulvertCapacityPytTool_CulvertToolkit(*gp_fixargs((points_filepath, raster_flowdir_filepath, raster_flowlen_filepath, raster_slope_filepath, raster_curvenumber_filepath, precip_src_config_filepath, output_points_filepath), True)))
-        return retval
-    except Exception as e:
-        raise e
+    return convertArcObjectToPythonObject(_gp_tool('CulvertCapacityPytTool_CulvertToolkit')(*gp_fixargs((points_filepath, raster_flowdir_filepath, raster_flowlen_filepath, raster_slope_filepath, raster_curvenumber_filepath, precip_src_config_filepath, output_points_filepath), True)))
 
 @gptooldoc('NaaccEtlPytTool_CulvertToolkit', None)
 def NaaccEtlPytTool(naacc_src_table=None, output_fc=None):
@@ -69,13 +73,7 @@ def NaaccEtlPytTool(naacc_src_table=None, output_fc=None):
      OUTPUTS:
       output_fc (Feature Class):
           Path in a geodatabase to save the new, ready-to-use feature class"""
-    from arcpy.geoprocessing._base import gp, gp_fixargs
-    from arcpy.arcobjects.arcobjectconversion import convertArcObjectToPythonObject
-    try:
-        retval = convertArcObjectToPythonObject(gp.NaaccEtlPytTool_CulvertToolkit(*gp_fixargs((naacc_src_table, output_fc), True)))
-        return retval
-    except Exception as e:
-        raise e
+    return convertArcObjectToPythonObject(_gp_tool('NaaccEtlPytTool_CulvertToolkit')(*gp_fixargs((naacc_src_table, output_fc), True)))
 
 @gptooldoc('NaaccSnappingPytTool_CulvertToolkit', None)
 def NaaccSnappingPytTool(naacc_points_table=None, naacc_points_table_join_field=None, geometry_source_table=None, geometry_source_table_join_field=None, output_fc=None):
@@ -102,13 +100,7 @@ def NaaccSnappingPytTool(naacc_points_table=None, naacc_points_table_join_field=
      OUTPUTS:
       output_fc (Feature Class):
           New feature class with updated geometries."""
-    from arcpy.geoprocessing._base import gp, gp_fixargs
-    from arcpy.arcobjects.arcobjectconversion import convertArcObjectToPythonObject
-    try:
-        retval = convertArcObjectToPythonObject(gp.NaaccSnappingPytTool_CulvertToolkit(*gp_fixargs((naacc_points_table, naacc_points_table_join_field, geometry_source_table, geometry_source_table_join_field, output_fc), True)))
-        return retval
-    except Exception as e:
-        raise e
+    return convertArcObjectToPythonObject(_gp_tool('NaaccSnappingPytTool_CulvertToolkit')(*gp_fixargs((naacc_points_table, naacc_points_table_join_field, geometry_source_table, geometry_source_table_join_field, output_fc), True)))
 
 @gptooldoc('NoaaRainfallEtlPytTool_CulvertToolkit', None)
 def NoaaRainfallEtlPytTool(aoi_geo=None, target_raster=None, out_folder=None, out_file_name=None):
@@ -157,14 +149,8 @@ def NoaaRainfallEtlPytTool(aoi_geo=None, target_raster=None, out_folder=None, ou
           file . This is a JSON file that will store reference to outputs and is
           used as an input to other tools. Defaults to
           "rainfall_rasters_config.json"."""
-    from arcpy.geoprocessing._base import gp, gp_fixargs
-    from arcpy.arcobjects.arcobjectconversion import convertArcObjectToPythonObject
-    try:
-        retval = convertArcObjectToPythonObject(gp.NoaaRainfallEtlPytTool_CulvertToolkit(*gp_fixargs((aoi_geo, target_raster, out_folder, out_file_name), True)))
-        return retval
-    except Exception as e:
-        raise e
+    return convertArcObjectToPythonObject(_gp_tool('NoaaRainfallEtlPytTool_CulvertToolkit')(*gp_fixargs((aoi_geo, target_raster, out_folder, out_file_name), True)))
 
 
 # End of generated toolbox code
-del gptooldoc, gp, gp_fixargs, convertArcObjectToPythonObject
\ No newline at end of file
+del gptooldoc
\ No newline at end of file
@@ -1,14 +1,14 @@
-from typing import List, Optional, Union
-import pint
-from dataclasses import dataclass, field, asdict, fields
+from typing import List, Optional, Union, get_args, get_origin
+from functools import lru_cache
+from dataclasses import dataclass, field, asdict, fields, is_dataclass
 from marshmallow import EXCLUDE, pre_load
 from marshmallow_dataclass import class_schema
+import numpy
 
-from .calculators.runoff import Runoff, time_of_concentration_calculator
+from .calculators.runoff import Runoff, time_of_concentration_calculator, time_of_concentration_calculator_batch
 from .calculators.capacity import Capacity
 from .calculators.overflow import Overflow, max_return_calculator
-
-units = pint.UnitRegistry()
+from .utils import get_type, get_units, DATACLASS_SLOTS
 
 # ------------------------------------------------------------------------------
 # HELPERS
@@ -18,61 +18,117 @@ def req_field():
     """
     return field(metadata=dict(required=True))
 
+@lru_cache(maxsize=None)
+def get_schema(dataclass_model):
+    """returns a shared marshmallow schema instance for a dataclass. Building 
+    a schema sets up all of its fields, so it's done once per dataclass and
+    the instance is reused for every load/dump.
+
+    :param dataclass_model: a dataclass from this package
+    :type dataclass_model: type
+    :return: marshmallow schema instance
+    :rtype: marshmallow.Schema
+    """
+    return class_schema(dataclass_model)()
+
+@lru_cache(maxsize=None)
+def _conversion_factor(from_units, to_units):
+    """multiplier to convert values from one unit to another, e.g., from
+    NOAA's 'inches / 1000' to 'cm'. Pint parses and checks the units once per
+    pair of units rather than once per value.
+    """
+    return get_units().Quantity(f'1 {from_units}').m_as(to_units)
+
 def cast_to_numeric_fields(data, dataclass_model, **kwargs):
     """when loading or validating, attempt to cast numbers from strings based on the model field types."""
     numeric_fields = {k: v.type for k, v in dataclass_model.__dataclass_fields__.items() if v.type in [int, float]}
     # for each numeric field name and type
     for fld, typ in numeric_fields.items():
-        # if the field is present in the data being serialized:
-        if fld in data.keys():
-            # if the value (data) being serialized isn't of the type spec'd in the
-            # dataclasse, and the data isn't empty:
-            if not isinstance(data[fld], typ) and data[fld] is not None:
-                #print(data[fld], type(data[fld]), isinstance(data[fld], typ), type(data[fld]) is not None)
-                # try to cast the value to the spec'd data type
-                try:
-                    data[fld] = typ(data[fld])
-                # If it can't be cast to the numeric type, then leave it.
-                # The record will fail validation.
-                except ValueError as e:
-                    #print(e, fld, data[fld])
-                    pass
+        value = data.get(fld)
+        # if the field is present in the data being serialized, the value
+        # isn't of the type spec'd in the dataclass, and the data isn't empty:
+        if value is not None and not isinstance(value, typ):
+            # try to cast the value to the spec'd data type
+            try:
+                data[fld] = typ(value)
+            # If it can't be cast to the numeric type, then leave it.
+            # The record will fail validation.
+            except (ValueError, TypeError):
+                pass
     return data
 
+@lru_cache(maxsize=None)
+def _cast_plan(dataclass_model):
+    """for cast_fields: the (field name, type, is numeric) of each field in a 
+    dataclass, with Unions (e.g., Optional[str]) resolved to the first type 
+    that isn't None. Built once per dataclass rather than for every record.
+    """
+    plan = []
+    for f in fields(dataclass_model):
+        ftype = f.type
+        # handle fields that are not a type (like a Union)
+        if type(ftype) is not type:
+            # filter out the NoneTypes and get the first type spec'd
+            types = [x for x in get_args(ftype) if x is not type(None)]
+            if not types:
+                continue
+            ftype = types[0]
+        plan.append((f.name, ftype, ftype in (int, float)))
+    return tuple(plan)
+
 def cast_fields(data, dataclass_model, **kwargs):
     """when loading or validating, attempt to cast values to their spec'd types."""
-    ftypes = {}
-    # create a lookup of fields grouped by type
-    for d in [dict(n=f.name, t=f.type) for f in fields(dataclass_model)]:
-        ftypes.setdefault(d['t'], []).append(d['n'])
-    # handle any of the fields are not type (like a Union)
-    for k in [t for t in ftypes.keys() if type(t) is not type]:
-        # filter out the NoneTypes
-        types = [x for x in k.__args__ if x != type(None)]
-        # get the first type spec'd
-        if len(types) > 0:
-            # replace the item in ftypes
-            t = types[0]
-            v = ftypes.pop(k)
-            ftypes[t] = v
-
-    for ftype, flds in ftypes.items():
-        for fld in flds:
-            # if the field is present in the data being serialized:
-            if fld in data.keys():
-                # if the value (data) being serialized isn't of the type spec'd in the
-                # dataclasse, and the data isn't empty:
-                if not isinstance(data[fld], ftype) and data[fld] is not None:
-                    #print(data[fld], type(data[fld]), isinstance(data[fld], typ), type(data[fld]) is not None)
-                    # try to cast the value to the spec'd data type
-                    try:
-                        data[fld] = ftype(data[fld])
-                    # If it can't be cast to the numeric type, then leave it.
-                    # The record will fail validation.
-                    except ValueError as e:
-                        #print(e, fld, data[fld])
-                        pass
-    return data    
+    for fld, ftype, numeric in _cast_plan(dataclass_model):
+        value = data.get(fld)
+        # skip values that are empty or already of the type spec'd in the
+        # dataclass
+        if value is None or isinstance(value, ftype):
+            continue
+        # blank strings are common in NAACC tables and never parse as 
+        # numbers; leave them as-is rather than raising and catching a 
+        # ValueError for each one. The record will fail validation.
+        if numeric and value.__class__ is str and not value.strip():
+            continue
+        # try to cast the value to the spec'd data type
+        try:
+            data[fld] = ftype(value)
+        # If it can't be cast to the spec'd type, then leave it.
+        # The record will fail validation.
+        except (ValueError, TypeError):
+            pass
+    return data
+
+def _build_value(typ, value):
+    """helper for build_dataclass: builds a single value according to its 
+    field type, recursing into Optionals, Lists, and nested dataclasses.
+    """
+    if value is None:
+        return None
+    origin = get_origin(typ)
+    if origin is Union:
+        return _build_value(get_type(typ), value)
+    if origin is list:
+        item_types = get_args(typ)
+        if item_types:
+            return [_build_value(item_types[0], v) for v in value]
+        return list(value)
+    if is_dataclass(typ) and isinstance(value, dict):
+        return build_dataclass(typ, value)
+    return value
+
+def build_dataclass(dataclass_model, data):
+    """instantiate a (possibly nested) dataclass directly from a dictionary,
+    skipping schema validation entirely. Keys that aren't fields on the
+    dataclass are ignored.
+
+    Only use this for data that is already known to be schema-correct, e.g., a
+    config that was written by our own schema's `dump`.
+    """
+    return dataclass_model(**{
+        f.name: _build_value(f.type, data[f.name])
+        for f in fields(dataclass_model)
+        if f.name in data
+    })
 
 # ------------------------------------------------------------------------------
 # ------------------------------------------------------------------------------
@@ -86,7 +142,7 @@ def cast_fields(data, dataclass_model, **kwargs):
 # about each raster (RainfallRaster) in a config object, RainfallRasterConfig,
 # that is written out to a JSON file.
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class RainfallRaster:
     """Store a reference on disk to a NOAA Rainfall raster. NOAA Rainfall data 
     comes as 1000ths of an inch.
@@ -104,7 +160,7 @@ class RainfallRaster:
 RainfallRasterSchema = class_schema(RainfallRaster)
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class RainfallRasterConfig:
     """store rainfall download metadata with methods for portability
     """
@@ -125,7 +181,7 @@ RainfallRasterConfigSchema = class_schema(RainfallRasterConfig)
 # -------------------------------------
 # ANALYSIS RESULTS
 
-@dataclass
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class Rainfall:
     """Rainfall amounts stored by storm frequency and duration interval.
     NOAA Rainfall data comes as 1000ths of an inch.
@@ -138,7 +194,7 @@ class Rainfall:
     units: Optional[str] = "inches / 1000"
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class Analytics:
     """analytics--runoff and overflow--for a given rainfall storm frequency and duration interval
     """
@@ -156,7 +212,7 @@ AnalyticsSchema = class_schema(Analytics)
 # LOCATION TYPES
 
  
-@dataclass
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class NaaccCulvert:
     """NAACC model for a single culvert. Use primarily for validating and 
     type-casting incoming NAACC CSVs.
@@ -218,7 +274,7 @@ class NaaccCrossing:
 NaaccCrossingSchema = class_schema(NaaccCrossing)
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class Shed:
     """Characteristics of a single point's contributing area
     """
@@ -257,8 +313,30 @@ class Shed:
 
 ShedSchema = class_schema(Shed)
 
+def calculate_tc_array(max_fl, avg_slope_pct, tc_hr) -> numpy.ndarray:
+    """Batch version of Shed.calculate_tc, for arrays with one value per shed
+    (NaN where missing). As with Shed.calculate_tc, time of concentration is
+    only calculated where both slope and max flow length are available and
+    non-zero; elsewhere the existing tc_hr is kept.
+
+    :param max_fl: maximum flow length of each shed
+    :type max_fl: numpy.ndarray
+    :param avg_slope_pct: average percent slope of each shed
+    :type avg_slope_pct: numpy.ndarray
+    :param tc_hr: existing time of concentration of each shed
+    :type tc_hr: numpy.ndarray
+    :return: time of concentration of each shed
+    :rtype: numpy.ndarray
+    """
+    has_inputs = (numpy.nan_to_num(max_fl) != 0) & (numpy.nan_to_num(avg_slope_pct) != 0)
+    return numpy.where(
+        has_inputs,
+        time_of_concentration_calculator_batch(max_fl, avg_slope_pct),
+        tc_hr
+    )
+
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class DrainItPoint:
     """Basic model for points used as source delineations for peak-flow-calcs;
     minimal attributes required.
@@ -328,7 +406,7 @@ class DrainItPoint:
                     avg_rainfall_cm = r.value
                 else:
                     # convert from whatever unit is in the config file to cm
-                    avg_rainfall_cm = units.Quantity(f'{r.value} {r.units}').m_as(TARGET_UNITS)
+                    avg_rainfall_cm = r.value * _conversion_factor(r.units, TARGET_UNITS)
             else:
                 avg_rainfall_cm = 0
             self.analytics.append(Analytics(
@@ -340,23 +418,65 @@ class DrainItPoint:
     def calculate_summary_analytics(self):
         """derive additional analytics once all others are calculated
         """
-        if self.capacity and self.analytics:
-            freqs = []
-            ovfs = []
-            for r in self.analytics:
-                freqs.append(r.frequency)
-                if r.overflow:
-                    ovfs.append(r.overflow.crossing_overflow_m3s)
-                else:
-                    ovfs.append(None)
-            self.capacity.max_return_period = max_return_calculator(ovfs, freqs)
+        if not self.capacity or not self.analytics:
+            return
+        freqs = [r.frequency for r in self.analytics]
+        ovfs = [
+            r.overflow.crossing_overflow_m3s if r.overflow else None 
+            for r in self.analytics
+        ]
+        self.capacity.max_return_period = max_return_calculator(ovfs, freqs)
 
 DrainItPointSchema = class_schema(DrainItPoint)
 
+def derive_rainfall_analytics_batch(points: List[DrainItPoint]) -> numpy.ndarray:
+    """Batch version of DrainItPoint.derive_rainfall_analytics: derives the
+    Analytics for many points, converting all of their rainfall to
+    centimeters with one array multiply.
+
+    :param points: list of DrainItPoints
+    :type points: List[DrainItPoint]
+    :return: rainfall in centimeters, with one row per point and one column
+        per frequency; NaN-padded where points have fewer frequencies (or no
+        shed)
+    :rtype: numpy.ndarray
+    """
+    # NOTE: rainfall in centimeters required by the peak-flow calculator
+    TARGET_UNITS = 'cm'
+
+    rainfalls = [
+        (pt.shed.avg_rainfall or []) if pt.shed else []
+        for pt in points
+    ]
+    n_freqs = max([len(r) for r in rainfalls], default=0)
+    values = numpy.full((len(points), n_freqs), numpy.nan)
+    factors = numpy.ones((len(points), n_freqs))
+    for i, point_rainfalls in enumerate(rainfalls):
+        for j, r in enumerate(point_rainfalls):
+            if r.value:
+                values[i, j] = r.value
+                if r.units != TARGET_UNITS:
+                    # convert from whatever unit is in the config file to cm
+                    factors[i, j] = _conversion_factor(r.units, TARGET_UNITS)
+            else:
+                values[i, j] = 0
+    avg_rainfall_cm = values * factors
+
+    # copy rainfall analytics
+    for pt, point_rainfalls, row in zip(points, rainfalls, avg_rainfall_cm.tolist()):
+        for r, value in zip(point_rainfalls, row):
+            pt.analytics.append(Analytics(
+                duration=r.dur,
+                frequency=r.freq,
+                avg_rainfall_cm=value
+            ))
+
+    return avg_rainfall_cm
+
 # ------------------------------------------------------------------------------
 # WORKFLOW MODELS
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class WorkflowConfig:
     """Store all parameters required for any of our model runs.
     """
@@ -425,6 +545,37 @@ class WorkflowConfig:
 
     meta: Optional[dict] = field(default_factory=dict)
 
+    def shed_arrays(self, points=None) -> dict:
+        """the characteristics of the points' sheds as arrays, with one value
+        per point (NaN where missing), for use with the batch calculators.
+
+        :param points: subset of points to use; defaults to all points
+        :type points: List[DrainItPoint], optional
+        :return: arrays of area_sqkm, avg_slope_pct, avg_cn, max_fl, and tc_hr
+        :rtype: dict
+        """
+        points = self.points if points is None else points
+        sheds = [pt.shed for pt in points]
+        return {
+            attr: numpy.array(
+                [getattr(shed, attr) if shed else None for shed in sheds], 
+                dtype=float
+            )
+            for attr in ('area_sqkm', 'avg_slope_pct', 'avg_cn', 'max_fl', 'tc_hr')
+        }
+
+    def bulk_update(self, **kwargs):
+        """update several attributes of the config at once, in place. Unlike 
+        dataclasses.replace, this doesn't copy the (potentially large) config.
+        Raises an AttributeError if any of the keywords aren't config fields.
+        """
+        unknown = [k for k in kwargs if k not in self.__dataclass_fields__]
+        if unknown:
+            raise AttributeError(f"not WorkflowConfig fields: {unknown}")
+        for k, v in kwargs.items():
+            setattr(self, k, v)
+        return self
+
 
 WorkflowConfigSchema = class_schema(WorkflowConfig)
 
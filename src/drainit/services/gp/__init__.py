@@ -4,11 +4,14 @@ from ...settings import USE_ESRI
 # class GP:
 #     pass
 
+# This runs once per process: later imports (e.g., from each toolbox tool 
+# run in an ArcGIS Pro session) get the loaded module, and its GP, from 
+# sys.modules. Only problems with the backend are echoed, so tool runs 
+# aren't prefixed with a status message.
 if USE_ESRI:
     try:
         # import arcpy
         from ._esri import GP
-        echo("ArcPy available.")
     except ModuleNotFoundError:
         echo("ArcPy not available. ArcPy is currently the only supported geoprocessing backend.")
         # from ._wbt import *
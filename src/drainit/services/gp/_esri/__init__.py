@@ -10,18 +10,25 @@ geoprocessing tasks with Esri Arcpy
 # ]
 
 # standard library
-import os, time
+import os, sys, time
+import shutil
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
 from pathlib import Path
+from tempfile import mkdtemp
 from typing import List, Tuple, Dict, Union
 import json
+from operator import attrgetter
 from statistics import mean
 import pdb
 
 # third party tools
 import petl as etl
-import pint
 import click
 import pandas as pd
+import numpy as np
 from codetiming import Timer
 from tqdm import tqdm
 # from mpire import WorkerPool
@@ -32,9 +39,10 @@ from tqdm import tqdm
 
 # ArcPy imports
 from arcpy import EnvManager, env
-from arcpy import Describe, Raster, FeatureSet, RecordSet, CreateUniqueName, ListFields
-from arcpy import SpatialReference, PointGeometry
+from arcpy import Describe, Raster, FeatureSet, CreateUniqueName, ListFields, Exists
+from arcpy import SpatialReference, PointGeometry, Extent
 from arcpy import Point as ArcPoint
+from arcpy import RasterToNumPyArray
 
 from arcpy.conversion import (
     RasterToPolygon,
@@ -49,19 +57,20 @@ from arcpy.sa import (
     IsNull,
     ZonalStatisticsAsTable, 
     FlowDirection, 
-    Con, 
-    CellStatistics,
+    Reclassify,
+    RemapValue,
     Arithmetic
 ) #, ZonalGeometryAsTable
 from arcpy.da import (
     SearchCursor, 
     InsertCursor, 
-    Describe as DaDescribe
+    Describe as DaDescribe,
+    NumPyArrayToFeatureClass,
+    TableToNumPyArray
 )
 from arcpy.management import (
     CreateFileGDB,
     Delete,
-    Dissolve,
     CopyFeatures,
     ProjectRaster,
     MinimumBoundingGeometry,
@@ -88,11 +97,248 @@ from arcpy import AddMessage, AddWarning, AddError
 
 # this package
 from ....config import FREQUENCIES, QP_HEADER, VALIDATION_ERRORS_FIELD_LENGTH
-from ....models import WorkflowConfig, DrainItPoint, DrainItPointSchema, Shed, Rainfall, RainfallRasterConfig
+from ....models import WorkflowConfig, DrainItPoint, Shed, Rainfall, RainfallRasterConfig
 from ...naacc import NaaccEtl
-
-
-units = pint.UnitRegistry()
+from ....utils import get_units, parse_json
+
+# Python types to the ArcGIS field types used to store them; anything else
+# is stored as TEXT
+ARCGIS_FIELD_TYPES = {
+    int: "LONG",
+    float: "FLOAT",
+    str: "TEXT",
+    bool: "SHORT"
+}
+
+# NumPy dtypes that NumPyArrayToFeatureClass writes as the ArcGIS field types 
+# above; TEXT fields are written as fixed-width unicode of the field's length
+NUMPY_DTYPES = {
+    "LONG": 'i4',
+    "FLOAT": 'f4',
+    "SHORT": 'i2'
+}
+
+# length of TEXT fields added without one
+DEFAULT_TEXT_FIELD_LENGTH = 255
+
+# name of the two-element (x, y) column that holds point geometry in the 
+# structured arrays written with NumPyArrayToFeatureClass
+NUMPY_SHAPE_FIELD = "shape_xy"
+
+# NumPy text columns are fixed-width, sized to the field length (e.g., 
+# 40 KB per row for `validation_errors`); tables whose structured array 
+# would be larger than this are written row-by-row instead
+MAX_BULK_ARRAY_BYTES = 256 * 1024 ** 2
+
+# field types whose values are the same read through an arcpy.da cursor as 
+# through a FeatureSet's JSON (unlike, e.g., dates and single-precision 
+# floats), so that tables with only these fields can be read with a cursor
+CURSOR_READABLE_FIELD_TYPES = {
+    "String",
+    "Integer",
+    "SmallInteger",
+    "Double",
+    "Guid",
+    "GlobalID"
+}
+
+# with multiprocessing, smaller batches of rasters than this are converted in
+# the calling process, since starting worker processes costs more than it saves
+MIN_RASTERS_FOR_MULTIPROCESSING = 4
+
+@lru_cache(maxsize=64)
+def _spatial_reference(wkid) -> SpatialReference:
+    """returns an arcpy SpatialReference for a WKID. Constructing one looks 
+    the WKID up in the projection engine's database, so they are created 
+    once per WKID and shared; nothing here modifies them.
+    """
+    return SpatialReference(wkid)
+
+@lru_cache(maxsize=256)
+def _linear_unit_name(dataset: str) -> str:
+    """returns the (lower-cased) linear unit name of a dataset's coordinate 
+    system. The input rasters are described again for every point analyzed, 
+    so the result is cached per path; `delineation_and_analysis_in_parallel`
+    clears the cache (see `_clear_dataset_caches`) at the start of each run, 
+    in case a dataset has been replaced since the last one.
+    """
+    return Describe(dataset).spatialReference.linearUnitName.lower()
+
+@lru_cache(maxsize=256)
+def _extent(dataset: str):
+    """returns a dataset's extent; cached and cleared like `_linear_unit_name`.
+    """
+    return Describe(dataset).extent
+
+@lru_cache(maxsize=256)
+def _cell_size(dataset: str) -> float:
+    """returns a raster's cell width; cached and cleared like 
+    `_linear_unit_name`.
+    """
+    return Describe(dataset).meanCellWidth
+
+@lru_cache(maxsize=64)
+def _raster(dataset: str) -> Raster:
+    """returns an arcpy Raster for an input raster dataset. The same inputs 
+    (flow length, slope, curve number, and each rainfall raster) are used for
+    every point analyzed, so each is opened once and reused; cached and 
+    cleared like `_linear_unit_name`.
+    """
+    return Raster(dataset)
+
+def _zonal_range(zone_raster, value_raster, extent):
+    """returns the range (maximum - minimum) of a value raster's cells within
+    the data cells of a zone raster, reading only the window of each that 
+    covers the given extent into NumPy. 
+    
+    Both rasters must be on the same grid (cell size and alignment) for the 
+    cells to line up; None is returned if they aren't, or if there are no 
+    cells with values in the zone, so that the caller can fall back to map 
+    algebra.
+    """
+    zone_ext, value_ext = zone_raster.extent, value_raster.extent
+    c = zone_raster.meanCellWidth
+    tolerance = c * 1e-6
+    if not math.isclose(value_raster.meanCellWidth, c, abs_tol=tolerance):
+        return None
+    for offset in (value_ext.XMin - zone_ext.XMin, value_ext.YMin - zone_ext.YMin):
+        if abs(offset / c - round(offset / c)) * c > tolerance:
+            return None
+    # the window, on the shared grid and inside both rasters
+    x0 = zone_ext.XMin + math.floor((max(extent.XMin, zone_ext.XMin, value_ext.XMin) - zone_ext.XMin) / c + 1e-6) * c
+    y0 = zone_ext.YMin + math.floor((max(extent.YMin, zone_ext.YMin, value_ext.YMin) - zone_ext.YMin) / c + 1e-6) * c
+    x1 = min(extent.XMax, zone_ext.XMax, value_ext.XMax)
+    y1 = min(extent.YMax, zone_ext.YMax, value_ext.YMax)
+    ncols = math.ceil((x1 - x0) / c - 1e-6)
+    nrows = math.ceil((y1 - y0) / c - 1e-6)
+    if ncols <= 0 or nrows <= 0:
+        return None
+    lower_left = ArcPoint(x0, y0)
+    zones = RasterToNumPyArray(zone_raster, lower_left, ncols, nrows)
+    values = RasterToNumPyArray(value_raster, lower_left, ncols, nrows)
+    in_zone = values[zones != zone_raster.noDataValue]
+    if value_raster.noDataValue is not None:
+        in_zone = in_zone[in_zone != value_raster.noDataValue]
+    if in_zone.size == 0:
+        return None
+    return float(in_zone.max()) - float(in_zone.min())
+
+def _clear_dataset_caches():
+    """clears the cached descriptions and Raster objects of input datasets.
+    """
+    for cached in (_linear_unit_name, _extent, _cell_size, _raster):
+        cached.cache_clear()
+
+def _infer_field_types(petl_table) -> Dict[str, type]:
+    """infer a Python type for each field in a PETL table from the types of 
+    its (non-null) values, preferring float, then int, str, and bool; fields 
+    with no values are str. The types of all columns are collected in a 
+    single pass over the table, rather than one pass per column (as with 
+    etl.typeset).
+    """
+    header = etl.header(petl_table)
+    typesets = [set() for _ in header]
+    for row in etl.data(petl_table):
+        for ftypes, v in zip(typesets, row):
+            ftypes.add(type(v))
+    field_types_lookup = {}
+    for h, ftypes in zip(header, typesets):
+        for t in (float, int, str, bool):
+            if t in ftypes:
+                field_types_lookup[h] = t
+                break
+        else:
+            field_types_lookup[h] = str
+    return field_types_lookup
+
+def _container_columns(petl_table) -> List[int]:
+    """returns the positions of the columns in a PETL table whose first 
+    non-null value is a dict or list. Reads only as far into the table as
+    it takes to find a non-null value in every column.
+    """
+    unresolved = set(range(len(etl.header(petl_table))))
+    container_idxs = []
+    for row in etl.data(petl_table):
+        for i in [i for i in unresolved if i < len(row) and row[i] is not None]:
+            unresolved.discard(i)
+            if isinstance(row[i], (dict, list)):
+                container_idxs.append(i)
+        if not unresolved:
+            break
+    return sorted(container_idxs)
+
+def _arcgis_field_definitions(header, field_types_lookup) -> List[list]:
+    """returns the AddFields field descriptions ([name, type] or [name, 
+    type, alias, length]) used to store the columns of a PETL table with the 
+    given header. Field types come from field_types_lookup, crosswalked to 
+    ArcGIS field types, and fall back to TEXT for fields not in the lookup. 
+    The `validation_errors` field gets a longer length than the default.
+    """
+    # TODO - do this in a more generic way (e.g., a schema-agnostic 
+    # field_lookup format)
+    fields_to_add = []
+    for h in header:
+        ftype = ARCGIS_FIELD_TYPES.get(field_types_lookup.get(h, str), "TEXT")
+        if h == 'validation_errors':
+            fields_to_add.append([h, ftype, h, VALIDATION_ERRORS_FIELD_LENGTH])
+        else:
+            fields_to_add.append([h, ftype])
+    return fields_to_add
+
+def _has_nulls(petl_table, columns) -> bool:
+    """returns True if any of the named columns of a PETL table hold a None.
+    Stops reading the table at the first one found.
+    """
+    idxs = [i for i, h in enumerate(etl.header(petl_table)) if h in columns]
+    for row in etl.data(petl_table):
+        for i in idxs:
+            if i < len(row) and row[i] is None:
+                return True
+    return False
+
+def _process_pool(max_workers, initializer=None) -> ProcessPoolExecutor:
+    """returns a ProcessPoolExecutor for running ArcPy work in parallel. 
+    Workers are spawned with the environment's Python interpreter: inside 
+    ArcGIS Pro, sys.executable is ArcGISPro.exe rather than Python.
+    """
+    context = multiprocessing.get_context("spawn")
+    python = os.path.join(sys.exec_prefix, "python.exe")
+    if os.name == "nt" and os.path.exists(python):
+        context.set_executable(python)
+    return ProcessPoolExecutor(
+        max_workers=max_workers, 
+        mp_context=context, 
+        initializer=initializer
+    )
+
+def _init_analysis_worker(scratch_root):
+    """initializes a worker process for `delineation_and_analysis_in_parallel`
+    with its own scratch workspace, so that workers don't contend for locks 
+    on the same scratch geodatabase. Workspaces are created inside 
+    scratch_root, which the caller removes when it's done with the pool.
+    """
+    env.scratchWorkspace = mkdtemp(prefix="drainit_", dir=scratch_root)
+
+def _zonal_means(table) -> List[float]:
+    """returns the MEAN values from a ZonalStatisticsAsTable output table, 
+    read straight into NumPy rather than via a RecordSet's JSON.
+    """
+    return TableToNumPyArray(table, ["MEAN"])["MEAN"].tolist()
+
+def _call_with_kwargs(func, kwargs):
+    """calls func with a dict of keyword arguments. Lets keyword-argument 
+    jobs be mapped over a process pool.
+    """
+    return func(**kwargs)
+
+def _featureset_to_dict(feature_set):
+    """parse an ArcPy FeatureSet or RecordSet to a dictionary (geoservices 
+    JSON). Serializing and parsing the JSON is the expensive part of reading
+    geodata, so callers that need the dictionary more than once should pass
+    it along rather than parsing the FeatureSet again (see the 
+    `featureset_as_dict` argument of `create_petl_table_from_geodata`).
+    """
+    return parse_json(feature_set.JSON)
 
 class GP:
 
@@ -101,6 +347,10 @@ class GP:
         self.config = config
         self.raster_field = "Value"
         self.all_sheds_raster = ""
+        # informational messages can be turned off (e.g., for large batch 
+        # runs) by setting the DRAINIT_VERBOSE environment variable to 0; 
+        # warnings, errors, and echoed messages are always output
+        self.verbose = os.environ.get("DRAINIT_VERBOSE", "1") != "0"
 
         # create unique scratch directories
         # scratchFolder = mkdtemp(prefix="drainit_{0}_".format(time.strftime("%Y%m%d%H%M%S", time.localtime())))
@@ -115,8 +365,12 @@ class GP:
     def msg(self, text, arc_status=None, set_progressor_label=False, echo=False):
         """
         output messages through Click.echo (cross-platform shell printing) 
-        and the ArcPy GP messaging interface and progress bars
+        and the ArcPy GP messaging interface and progress bars. Plain 
+        informational messages are skipped when self.verbose is False.
         """
+        if not (self.verbose or echo or arc_status or set_progressor_label):
+            return
+
         if echo:
             if arc_status:
                 click.echo("{0}: {1}".format(arc_status.upper(), text))
@@ -162,44 +416,43 @@ class GP:
 
         """
         
-        # set workspace location
+        # set workspace location. Paths are built as plain strings (with 
+        # os.path, which gives the same result as pathlib here): this is 
+        # called for every intermediate output, and the memory workspace 
+        # isn't a filesystem path anyway.
         if where == "in_memory":
             location = "memory"
         elif where == "fgdb":
-            location = Path(env.scratchGDB)
+            location = env.scratchGDB
         elif where == "folder":
-            location = Path(env.scratchFolder)
+            location = env.scratchFolder
         else:
-            loc = Path(where)
-            if loc.exists():
-                location = loc
-            else:
-                os.makedirs(where)
+            location = str(where)
+            if not os.path.exists(location):
+                os.makedirs(location)
                 # location = Path(env.scratchGDB)
         
-        if isinstance(location , str):
-            location = Path(location)
-        
         # create and return full path
         if suffix == "unique":
-            p = CreateUniqueName(prefix, str(location))
+            p = CreateUniqueName(prefix, location)
         elif suffix == "random":
-            p = str(
-                location / "{0}_{1}".format(
+            p = os.path.join(
+                location, 
+                "{0}_{1}".format(
                     prefix,
                     abs(hash(time.strftime("%Y%m%d%H%M%S", time.localtime())))
                 )
             )
         elif suffix == "timestamp":
-            p = str(
-                location /
+            p = os.path.join(
+                location,
                 "{0}_{1}".format(
                     prefix,
                     time.strftime("%Y%m%d%H%M%S", time.localtime())
                 )
             )
         else:
-            p = str(location / "_".join([prefix, suffix]))
+            p = os.path.join(location, "_".join([prefix, suffix]))
 
         # print(p)
         return p
@@ -228,15 +481,7 @@ class GP:
         return t
 
     def _xwalk_types_to_arcgis_fields(self, t):
-        if t is int:
-            return "LONG"
-        if t is float:
-            return "FLOAT"
-        if t is str:
-            return "TEXT"
-        if t is bool:
-            return "SHORT"
-        return "TEXT"
+        return ARCGIS_FIELD_TYPES.get(t, "TEXT")
 
     def _convert_dtypes_arcgis(self, df):
         """Convert dataframe dtypes which are not compatible with ArcGIS
@@ -247,14 +492,12 @@ class GP:
         # Use builtin Pandas dtype conversion
         df = df.convert_dtypes()
         
-        # Then str convert any remaining special object/category fields 
-        for col in df.columns:
-            # if df[col].dtype not in ["str", "float"]:
-            #     print(col, '/', df[col].dtype)
-            if df[col].dtype == 'object' or df[col].dtype == 'O':
-                # print(col)
-                df[col] = df[col].astype("str")
-            df[col].replace({pd.NA:None})
+        # Then str convert any remaining special object/category fields, all 
+        # at once
+        object_cols = df.select_dtypes(include=['object']).columns
+        df[object_cols] = df[object_cols].astype("str")
+        # replace pandas' NA values with None across the whole frame
+        df = df.replace({pd.NA: None})
         # Return modified df
         return df
 
@@ -358,7 +601,8 @@ class GP:
         self,
         feature_class:str, 
         include_geom:bool=False,
-        project_to_crs_wkid:Union[int, None]=None
+        project_to_crs_wkid:Union[int, None]=None,
+        featureset_as_dict:bool=False
         # alt_xy_fields:List[str]=None 
         ) -> Tuple[etl.Table, dict, int]:
         """Convert an Esri Feature Class to a PETL table object.
@@ -369,81 +613,135 @@ class GP:
         :type feature_class: str
         :param include_geom: include the feature geometry in the table.  Defaults to False
         :param include_geom: bool, optional
-        :return: tuple containing a PETL Table object, FeatureSet, and the WKID of the feature_class CRS
+        :param featureset_as_dict: return the FeatureSet parsed to a dictionary (geoservices JSON), rather than the FeatureSet object. It's only parsed once, even where the table is read from it. Defaults to False
+        :type featureset_as_dict: bool, optional
+        :return: tuple containing a PETL Table object, FeatureSet (or its dictionary), and the WKID of the feature_class CRS
         :rtype: Tuple(petl.Table, FeatureSet, int)
         """
         self.msg("Reading {0} into a PETL table object".format(feature_class))
         
-        # describe the feature class and get some properties
-        described_fc = Describe(feature_class)
-        field_objs = described_fc.fields # all fields
+        # describe the feature class and get some properties. arcpy.da's 
+        # Describe returns all of them in one dictionary, rather than each 
+        # being a separate lookup on a Describe object.
+        described_fc = DaDescribe(feature_class)
+        field_objs = described_fc['fields'] # all fields
         oid_field = None # OBJECTID OR FID field
-        if described_fc.hasOID:
-            oid_field = described_fc.OIDFieldName
-        shp_field = described_fc.shapeFieldName # SHAPE (geometry) field
-        crs_wkid = described_fc.spatialReference.factoryCode # spatial reference
+        if described_fc.get('hasOID'):
+            oid_field = described_fc['OIDFieldName']
+        shp_field = described_fc.get('shapeFieldName') # SHAPE (geometry) field
+        src_crs_wkid = described_fc['spatialReference'].factoryCode # spatial reference
+        crs_wkid = src_crs_wkid
 
         if project_to_crs_wkid:
             self.msg(f"reprojecting feature class from {crs_wkid} to {project_to_crs_wkid} when converting to PETL table.")
             crs_wkid = project_to_crs_wkid
-            spatial_ref = SpatialReference(project_to_crs_wkid)
+            spatial_ref = _spatial_reference(project_to_crs_wkid)
             fc = self._so("petl_geo_rp", where="fgdb")
             Project(feature_class, fc, spatial_ref)
         else:
             fc = feature_class
 
-        # read feature class as FeatureSet and
-        # convert to a python dictionary
+        # read feature class as FeatureSet
         feature_set = FeatureSet(fc)
-        fs = json.loads(feature_set.JSON)
-
+        fs = None
 
         # derive a list of fields to exclude from table conversion
         fields_to_exclude = [x for x in [oid_field, shp_field] if x]        
         # make a list of field names to include
         attr_fields = [f.name for f in field_objs if f.name not in fields_to_exclude]
-        # add a geometry field, which will contain geometry as a dictionary
-        if include_geom:
-            attr_fields.append('geometry')
 
         # self.msg(f"fields_to_exclude: {fields_to_exclude}", )
         # self.msg(f"attr_fields {attr_fields}")
-        
-        table = etl.fromdicts(fs['features'])
 
-        if etl.nrows(table) > 0:
-            table = etl\
-                .unpackdict(table, 'attributes')\
-                .cut(*attr_fields)
+        # Where a cursor reads every value the same way the FeatureSet's JSON 
+        # represents it, read the table straight from a cursor, which gives 
+        # flat rows; otherwise (e.g., dates, which are epoch milliseconds in 
+        # JSON), flatten the FeatureSet's JSON.
+        read_with_cursor = (
+            isinstance(fc, (str, os.PathLike))
+            and all(
+                f.type in CURSOR_READABLE_FIELD_TYPES 
+                for f in field_objs if f.name in attr_fields
+            )
+            and (
+                not include_geom 
+                or (
+                    described_fc.get('shapeType') == 'Point'
+                    and not described_fc.get('hasZ')
+                    and not described_fc.get('hasM')
+                )
+            )
+        )
+
+        if read_with_cursor:
+            if include_geom:
+                # remove existing x/y fields if any, adding the point geometry
+                # as x/y
+                header = [f for f in attr_fields if f not in ["x", "y"]]
+                cursor_fields = header + ["SHAPE@X", "SHAPE@Y"]
+                header += ["x", "y"]
+            else:
+                header = cursor_fields = attr_fields
+            rows = [tuple(header)]
+            with SearchCursor(str(fc), cursor_fields) as cursor:
+                rows.extend(cursor)
+            table = etl.wrap(rows)
+            has_rows = len(rows) > 1
+
+        else:
+            # convert the FeatureSet to a python dictionary
+            fs = _featureset_to_dict(feature_set)
 
+            # add a geometry field, which will contain geometry as a dictionary
             if include_geom:
-                # remove existing x/y fields if any, unpack the geometry dict
-                fields_to_keep = [f for f in etl.header(table) if f not in ["x", "y"]]
+                attr_fields.append('geometry')
+            
+            table = etl.fromdicts(fs['features'])
+            has_rows = etl.nrows(table) > 0
+
+            if has_rows:
                 table = etl\
-                    .cut(table, fields_to_keep)\
-                    .unpackdict('geometry')
+                    .unpackdict(table, 'attributes')\
+                    .cut(*attr_fields)
 
+                if include_geom:
+                    # remove existing x/y fields if any, unpack the geometry dict
+                    fields_to_keep = [f for f in etl.header(table) if f not in ["x", "y"]]
+                    table = etl\
+                        .cut(table, fields_to_keep)\
+                        .unpackdict('geometry')
+
+        if featureset_as_dict:
+            feature_set = fs if fs is not None else _featureset_to_dict(feature_set)
+
+        if has_rows:
             return table, feature_set, crs_wkid
         else:
             self.msg("The feature class is empty.", 'warning', echo=True)
-            return table, feature_set, described_fc.spatialReference.factoryCode
+            return table, feature_set, src_crs_wkid
 
     def create_dicts_from_geodata(self, path_to_geodata):
         """convert provider-formatted geodata to a Python dictionary"""
-        if Path(path_to_geodata).exists:
+        # arcpy.Exists, rather than Path.exists, so that feature classes 
+        # inside a geodatabase are found
+        if Exists(str(path_to_geodata)):
             fs = FeatureSet(path_to_geodata)
-            return json.loads(fs.JSON)
+            return _featureset_to_dict(fs)
         else:
             return {}
 
     def create_dataframe_from_geodata(
+        self,
         in_table, 
         input_fields=None, 
         where_clause=None
         ):
         """Convert an arcgis table into a pandas dataframe with an object ID 
         index, and the selected
-        input fields using an arcpy.da.SearchCursor.
+        input fields using arcpy.da.TableToNumPyArray, which reads the table 
+        straight into NumPy. Tables that NumPy can't represent that way (e.g.,
+        with nulls in integer or text fields, or geometry fields) are read 
+        with an arcpy.da.SearchCursor instead.
         https://gist.github.com/d-wasserman/e9c98be1d0caebc2935afecf0ba239a0
         """
         OIDFieldName = Describe(in_table).OIDFieldName
@@ -451,8 +749,12 @@ class GP:
             final_fields = [OIDFieldName] + input_fields
         else:
             final_fields = [field.name for field in ListFields(in_table)]
-        data = [row for row in SearchCursor(in_table, final_fields, where_clause=where_clause)]
-        fc_dataframe = pd.DataFrame(data, columns=final_fields)
+        try:
+            data = TableToNumPyArray(in_table, final_fields, where_clause=where_clause)
+            fc_dataframe = pd.DataFrame(data)
+        except (RuntimeError, TypeError, ValueError):
+            data = [row for row in SearchCursor(in_table, final_fields, where_clause=where_clause)]
+            fc_dataframe = pd.DataFrame(data, columns=final_fields)
         fc_dataframe = fc_dataframe.set_index(OIDFieldName, drop=True)
         return fc_dataframe
 
@@ -508,23 +810,11 @@ class GP:
         # NumPyArrayToFeatureClass(x, output_featureclass, (x_column, y_column), SpatialReference(sr))
 
         if not field_types_lookup:
-            field_types_lookup = {}
-            for h in etl.header(petl_table):
-                ftypes = [n for n in etl.typeset(petl_table, h) if n != 'NoneType']
-                if 'float' in ftypes:
-                    field_types_lookup[h] = float
-                elif 'int' in ftypes:
-                    field_types_lookup[h] = int
-                elif 'str' in ftypes:
-                    field_types_lookup[h] = str
-                elif 'bool' in ftypes:
-                    field_types_lookup[h] = bool
-                else:
-                    field_types_lookup[h] = str                    
+            field_types_lookup = _infer_field_types(petl_table)
 
         with EnvManager(overwriteOutput=True):
 
-            spatial_ref = SpatialReference(crs_wkid)
+            spatial_ref = _spatial_reference(crs_wkid)
 
             # Create an in_memory feature class to initially contain the points
             temp_fc = Path(self._so('temp_drainit_points',where="in_memory", suffix="random"))
@@ -548,32 +838,40 @@ class GP:
             # create the fields arg for AddFields_management from the fields in 
             # the provided PETL table, with field types coming from the provided 
             # field_types_lookup and crosswalked to the ArcPy field type args. 
-            # Fallback to a string type if the field in the table isn't in the
-            # lookup. Handle `validation_errors` field separately.
-            # TODO - do this in a more generic way (e.g., a schema-agnostic 
-            # field_lookup format)
-            fields_to_add = []
-            for h in etl.header(petl_table):
-                if h == 'validation_errors':
-                    fields_to_add.append([h, self._xwalk_types_to_arcgis_fields(field_types_lookup.get(h, str)), h, VALIDATION_ERRORS_FIELD_LENGTH])
-                else:
-                    fields_to_add.append([h, self._xwalk_types_to_arcgis_fields(field_types_lookup.get(h, str))])
+            fields_to_add = _arcgis_field_definitions(etl.header(petl_table), field_types_lookup)
             # print([f[0] for f in fields_to_add])
             AddFields_management(
                 temp_feature_class,
                 fields_to_add
             )
 
-            # Use an insert cursor to write rows from the PETL table to the temp feature class
+            # Use an insert cursor to write rows from the PETL table to the temp feature class.
+            # Rows are streamed from the table as plain tuples, with the x/y 
+            # columns looked up by position.
             fields_to_insert = [f[0] for f in fields_to_add]
             fields_to_insert.append("SHAPE@XY")
+            x_idx = fields_to_insert.index(x_column)
+            y_idx = fields_to_insert.index(y_column)
+            fallback_to_json_str = self._fallback_to_json_str
+            # dict and list values are stringified to JSON. Rather than 
+            # checking every value, find the columns that hold them from 
+            # each column's first non-null value, and convert only those.
+            json_idxs = _container_columns(petl_table)
             with InsertCursor(temp_feature_class, fields_to_insert) as cursor:
-                for idx, row in enumerate(list(etl.records(petl_table))):
+                for idx, row in enumerate(etl.data(petl_table)):
                     try:
-                        # convert any values that are dicts or lists to a stringified JSON:
-                        r = [self._fallback_to_json_str(v) for v in row] # all field values
-                        r.append([float(row[x_column]), float(row[y_column])]) # "SHAPE@XY"
-                        cursor.insertRow(r)
+                        r = list(row) # all field values
+                        for i in json_idxs:
+                            r[i] = fallback_to_json_str(r[i])
+                        r.append((float(row[x_idx]), float(row[y_idx]))) # "SHAPE@XY"
+                        try:
+                            cursor.insertRow(r)
+                        except (TypeError, ValueError, RuntimeError):
+                            # a dict or list where the column's first value 
+                            # wasn't one; convert all values and try again
+                            r = [fallback_to_json_str(v) for v in row]
+                            r.append((float(row[x_idx]), float(row[y_idx])))
+                            cursor.insertRow(r)
                     except Exception as e:
                         self.msg(f"Error creating row {idx} | {e}")
                         pass
@@ -591,7 +889,190 @@ class GP:
         # if as_dict:
         #     return json.loads(feature_set.JSON)
         # else:
-        return json.loads(feature_set.JSON)
+        return _featureset_to_dict(feature_set)
+
+    def create_numpy_array_from_petl_table(
+        self,
+        petl_table,
+        x_column,
+        y_column,
+        field_types_lookup={}
+        ):
+        """convert a PETL table to a NumPy structured array that can be written
+        to geodata in a single call (see `create_geodata_from_numpy_array`).
+        
+        Columns get the same field types and lengths as the row-by-row 
+        `create_geodata_from_petl_table`: types from field_types_lookup 
+        (falling back to str), crosswalked to ArcGIS field types, then to 
+        NumPy dtypes. Values that are dicts or lists are stringified to JSON. 
+        The point geometry is carried separately at full precision, in a 
+        two-element `NUMPY_SHAPE_FIELD` column. Null floats are carried as 
+        NaN; since NumPy has no other way of representing nulls, None is 
+        returned if any other columns contain nulls (or if a column can't be 
+        cast to its type, or text won't fit its field), so that callers can 
+        fall back to writing row-by-row.
+
+        Args:
+            petl_table (petl.Table): the source table
+            x_column (str): name of the column with X coordinates
+            y_column (str): name of the column with Y coordinates
+            field_types_lookup (dict, optional): lookup of field name to type. 
+
+        Returns:
+            numpy.ndarray: a structured array, or None
+        """
+        if 'OBJECTID' in list(etl.header(petl_table)):
+            petl_table = etl.cutout(petl_table, 'OBJECTID')
+
+        columns = etl.columns(petl_table)
+        nrows = len(next(iter(columns.values()), []))
+        if nrows == 0:
+            return None
+
+        try:
+            # rows without coordinates are skipped by the row-by-row insert; 
+            # leave those tables to it
+            xy = np.column_stack([
+                np.array(columns[x_column], dtype='f8'),
+                np.array(columns[y_column], dtype='f8')
+            ])
+        except (KeyError, ValueError, TypeError):
+            return None
+        if np.isnan(xy).any():
+            return None
+
+        fields_to_add = _arcgis_field_definitions(columns.keys(), field_types_lookup)
+        row_bytes = 2 * np.dtype('f8').itemsize # the geometry
+        for f in fields_to_add:
+            if f[1] == "TEXT":
+                row_bytes += 4 * (f[3] if len(f) > 3 else DEFAULT_TEXT_FIELD_LENGTH)
+            else:
+                row_bytes += np.dtype(NUMPY_DTYPES[f[1]]).itemsize
+        if row_bytes * nrows > MAX_BULK_ARRAY_BYTES:
+            return None
+
+        arrays, dtypes = [], []
+        for f in fields_to_add:
+            h, ftype = f[0], f[1]
+            values = columns[h]
+            try:
+                if ftype == "TEXT":
+                    length = f[3] if len(f) > 3 else DEFAULT_TEXT_FIELD_LENGTH
+                    values = [self._fallback_to_json_str(v) for v in values]
+                    if None in values or max(len(str(v)) for v in values) > length:
+                        return None
+                    arr = np.array(values, dtype=f'U{length}')
+                elif ftype == "FLOAT":
+                    arr = np.array(values, dtype=NUMPY_DTYPES[ftype])
+                elif None in values:
+                    return None
+                else:
+                    arr = np.array(values, dtype=NUMPY_DTYPES[ftype])
+            except (ValueError, TypeError):
+                return None
+            arrays.append(arr)
+            dtypes.append((h, arr.dtype))
+
+        array = np.empty(nrows, dtype=dtypes + [(NUMPY_SHAPE_FIELD, 'f8', 2)])
+        for (h, _), arr in zip(dtypes, arrays):
+            array[h] = arr
+        array[NUMPY_SHAPE_FIELD] = xy
+        return array
+
+    def create_geodata_from_numpy_array(
+        self,
+        array,
+        x_column,
+        y_column,
+        output_featureclass=None,
+        crs_wkid=4326
+        ):
+        """write a NumPy structured array to point geodata in one bulk 
+        operation, via arcpy.da.NumPyArrayToFeatureClass. 
+
+        Args:
+            array (numpy.ndarray): structured array, e.g., from `create_numpy_array_from_petl_table`
+            x_column (str): name of the field with X coordinates; used if 
+                the array has no `NUMPY_SHAPE_FIELD`
+            y_column (str): name of the field with Y coordinates; used if 
+                the array has no `NUMPY_SHAPE_FIELD`
+            output_featureclass (str, optional): output path. Defaults to None.
+            crs_wkid (int, optional): WKID of the coordinates. Defaults to 4326.
+
+        Returns:
+            dict: the geodata as geoservices JSON 
+        """
+        if NUMPY_SHAPE_FIELD in array.dtype.names:
+            shape_fields = [NUMPY_SHAPE_FIELD]
+        else:
+            shape_fields = (x_column, y_column)
+
+        with EnvManager(overwriteOutput=True):
+            temp_feature_class = self._so('temp_drainit_points', where="in_memory", suffix="random")
+            NumPyArrayToFeatureClass(
+                array,
+                temp_feature_class,
+                shape_fields,
+                _spatial_reference(crs_wkid)
+            )
+
+        if output_featureclass:
+            CopyFeatures(temp_feature_class, output_featureclass)
+
+        feature_set = FeatureSet(temp_feature_class)
+        return _featureset_to_dict(feature_set)
+
+    def create_geodata_from_petl_table_in_bulk(
+        self,
+        petl_table,
+        x_column,
+        y_column,
+        output_featureclass=None,
+        crs_wkid=4326,
+        field_types_lookup={}
+        ):
+        """convert a PETL table to a feature class with a single bulk write
+        where the table's values allow it, otherwise falling back to
+        `create_geodata_from_petl_table`'s row-by-row insert. Arguments and 
+        return value are the same as `create_geodata_from_petl_table`.
+        """
+        # infer the field types here (as the row-by-row insert would), so 
+        # that both paths write the same field types
+        if not field_types_lookup:
+            field_types_lookup = _infer_field_types(petl_table)
+
+        # NumPy can only carry nulls in float columns (as NaN). Check for
+        # them everywhere else before copying the table into columns; this 
+        # stops at the first null, so tables that have them (e.g., with 
+        # optional text fields) go to the row-by-row insert almost at once.
+        non_float_columns = [
+            h for h in etl.header(petl_table)
+            if h in [x_column, y_column] or field_types_lookup.get(h, str) is not float
+        ]
+        array = None
+        if not _has_nulls(petl_table, non_float_columns):
+            array = self.create_numpy_array_from_petl_table(
+                petl_table, 
+                x_column, 
+                y_column, 
+                field_types_lookup
+            )
+        if array is None:
+            return self.create_geodata_from_petl_table(
+                petl_table=petl_table,
+                x_column=x_column,
+                y_column=y_column,
+                output_featureclass=output_featureclass,
+                crs_wkid=crs_wkid,
+                field_types_lookup=field_types_lookup
+            )
+        return self.create_geodata_from_numpy_array(
+            array,
+            x_column,
+            y_column,
+            output_featureclass=output_featureclass,
+            crs_wkid=crs_wkid
+        )
 
     def create_geodata_from_drainitpoints(
         self, 
@@ -615,26 +1096,34 @@ class GP:
             # self.msg(p_srs)
             if len(p_srs) > 0:
                 try:
-                    spatial_ref = SpatialReference(p_srs[0])
+                    spatial_ref = _spatial_reference(p_srs[0])
                     # self.msg(f'DEBUG: using crs {spatial_ref.factoryCode} from point')
                 except Exception as e:
                     # self.msg(e)
-                    spatial_ref = SpatialReference(input_crs_wkid_override)
+                    spatial_ref = _spatial_reference(input_crs_wkid_override)
                     # self.msg(f'DEBUG: warning: falling back to default crs: {spatial_ref.factoryCode}')
                     
             else:
-                spatial_ref = SpatialReference(input_crs_wkid_override)
+                spatial_ref = _spatial_reference(input_crs_wkid_override)
                 # self.msg(f'DEBUG: falling back to default crs: {spatial_ref.factoryCode}')
 
             
 
-            # Create an in_memory feature class to initially contain the points
+            # if output_crs_wkid is spec'd, the points are projected as they're
+            # written, so the feature class is created in that CRS. 
+            if output_crs_wkid:
+                self.msg(f"reprojecting to {output_crs_wkid}")
+                output_spatial_ref = _spatial_reference(output_crs_wkid)
+            else:
+                output_spatial_ref = spatial_ref
+
+            # Create an in_memory feature class to contain the points
             temp_fc = Path(self._so('temp_drainit_points',where="in_memory", suffix="random"))
             feature_class = CreateFeatureclass_management(
                 out_path=str(temp_fc.parent), #"memory",
                 out_name=temp_fc.name,
                 geometry_type="POINT",
-                spatial_reference=spatial_ref
+                spatial_reference=output_spatial_ref
             )
 
             fields_to_add = [['uid', 'TEXT', 'uid', 255], ['group_id', 'TEXT', 'group_id', 255]]
@@ -645,38 +1134,29 @@ class GP:
             )
 
             # Open an insert cursor
-            with InsertCursor(feature_class, ['uid', 'group_id', "SHAPE@XY"]) as cursor:
-                # Iterate through list of coordinates and add to cursor
-                for pt in points:
-                    row = [pt.uid, pt.group_id, (pt.lng, pt.lat)]
-                    cursor.insertRow(row)
-
-            # reproject if output_crs_wkid is spec'd.
-            
-            if output_crs_wkid:
-                self.msg(f"reprojecting to {output_crs_wkid}")
-                feature_class_rp = CreateFeatureclass_management(
-                    out_path=env.scratchGDB, #"memory", 
-                    out_name="temp_drainit_points_rp", 
-                    geometry_type="POINT",
-                    spatial_reference=SpatialReference(output_crs_wkid)
-                )
-                Project(feature_class, feature_class_rp, SpatialReference(output_crs_wkid))
-                # Create a FeatureSet object and load in_memory feature class JSON as dict
-                feature_set = FeatureSet()
-                feature_set.load(feature_class_rp)
-            
+            get_point_values = attrgetter('uid', 'group_id', 'lng', 'lat')
+            if output_spatial_ref is spatial_ref:
+                with InsertCursor(feature_class, ['uid', 'group_id', "SHAPE@XY"]) as cursor:
+                    # Iterate through list of coordinates and add to cursor
+                    for uid, group_id, lng, lat in map(get_point_values, points):
+                        cursor.insertRow((uid, group_id, (lng, lat)))
             else:
-                # Create a FeatureSet object and load in_memory feature class JSON as dict
-                feature_set = FeatureSet()
-                feature_set.load(feature_class)
+                with InsertCursor(feature_class, ['uid', 'group_id', "SHAPE@"]) as cursor:
+                    # project each point to the output CRS as it's added
+                    for uid, group_id, lng, lat in map(get_point_values, points):
+                        geom = PointGeometry(ArcPoint(lng, lat), spatial_ref)
+                        cursor.insertRow((uid, group_id, geom.projectAs(output_spatial_ref)))
+
+            # Create a FeatureSet object and load in_memory feature class JSON as dict
+            feature_set = FeatureSet()
+            feature_set.load(feature_class)
 
         if output_points_filepath:
             feature_set.save(output_points_filepath)
 
         # return the dictionary (geoservices JSON as Python dictionary)
         if as_dict:
-            return json.loads(feature_set.JSON)
+            return _featureset_to_dict(feature_set)
         else:
             return feature_set
 
@@ -698,15 +1178,14 @@ class GP:
         # else:
         #     self.msg('Reading from file')
         
-        # extract feature class to a PETL table and a FeatureSet
-        raw_table, feature_set, crs_wkid = self.create_petl_table_from_geodata(
+        # extract feature class to a PETL table and the FeatureSet's JSON 
+        # representation
+        raw_table, feature_set_json, crs_wkid = self.create_petl_table_from_geodata(
             points_filepath,
-            include_geom=True
+            include_geom=True,
+            featureset_as_dict=True
         )
 
-        # convert the FeatureSet to its JSON representation
-        feature_set_json = json.loads(feature_set.JSON)
-
         # if this is geodata that follows the NAACC format, we use the NAACC
         # etl function to transform the table to a list of Point objects
         # with nested NAACC and capacity calc-ready attributes where possible
@@ -732,7 +1211,9 @@ class GP:
         # (This is workflow for Peak-Flow)
         else:
             self.msg('reading points')
-            for idx, r in enumerate(list(etl.dicts(raw_table))):
+            # rows are streamed from the table in a single pass, rather than 
+            # collected in a list first
+            for r in etl.dicts(raw_table):
                 point_kwargs = dict(
                     uid=r[uid_field],
                     lat=float(r['y']),
@@ -750,8 +1231,8 @@ class GP:
         if output_points_filepath:
             # finally, save it out
             self.msg('saving points')
-            # save a copy of the points feature_set to the output location
-            feature_set.save(output_points_filepath)
+            # save a copy of the points to the output location
+            CopyFeatures(points_filepath, output_points_filepath)
 
         # return the list of Point objects and a dict version of the FeatureSet
         return points, feature_set_json, crs_wkid
@@ -770,7 +1251,7 @@ class GP:
 
         fs = FeatureSet(in_features)
         # in-memory
-        mbg="memory\mbg"
+        mbg = r"memory\mbg"
         
         MinimumBoundingGeometry(
             fs,
@@ -778,27 +1259,97 @@ class GP:
             "RECTANGLE_BY_AREA",
             "ALL"
         )
-        d = Describe(mbg)
-        sr = d.spatialReference
-
-        pt = None
 
-        with SearchCursor(mbg, ["SHAPE@XY"]) as sc: 
+        # read the centroid, reprojected by the cursor if necessary
+        x, y = None, None
+        with SearchCursor(
+            mbg, 
+            ["SHAPE@XY"], 
+            spatial_reference=_spatial_reference(project_as) if project_as else None
+        ) as sc: 
             for r in sc:
                 x, y = r[0]
-                pt = ArcPoint(X=x, Y=y)
-
-        centroid = PointGeometry(inputs=pt, spatial_reference=sr)
-        # reproject
-        if project_as:
-            centroid = centroid.projectAs(SpatialReference(project_as))
 
         Delete(mbg)
         return dict(
-            lon=centroid.centroid.X,
-            lat=centroid.centroid.Y
+            lon=x,
+            lat=y
         )
 
+    @staticmethod
+    def _transform_rainfall_raster_job(
+        in_raster: str,
+        out_raster: str,
+        temp_raster: str,
+        target_crs_wkid=None,
+        project_raster_kwargs=None,
+        target_raster=None
+        ) -> str:
+        """Reprojects/resamples or copies one rainfall raster to a GeoTIFF. 
+        Used by `transform_rainfall_rasters`; takes and returns only paths so 
+        that it can run in a worker process.
+        """
+        if target_raster:
+            tsr = Raster(target_raster)
+            with EnvManager(
+                snapRaster=tsr,
+                extent=tsr.extent,
+                overwriteOutput=True
+            ):
+                ProjectRaster(in_raster, temp_raster, out_coor_system=tsr.spatialReference)
+            with EnvManager(
+                extent=tsr.extent,
+                snapRaster=tsr,
+                overwriteOutput=True
+            ):
+                Resample(temp_raster, out_raster, f'{tsr.meanCellWidth} {tsr.meanCellHeight}', "BILINEAR")
+
+        if target_crs_wkid:
+            sr=_spatial_reference(target_crs_wkid)
+            kwargs=dict(
+                in_raster=in_raster, 
+                out_raster=out_raster, 
+                out_coor_system=sr
+            )
+            if project_raster_kwargs:
+                kwargs.update(project_raster_kwargs)
+            ProjectRaster(**kwargs)
+
+        if not all([target_crs_wkid, target_raster]): #, convert_units_from, convert_units_to]):
+            CopyRaster(in_raster, out_raster)
+
+        return out_raster
+
+    @staticmethod
+    def _rainfall_raster_is_current(
+        in_raster: str,
+        out_raster: str,
+        target_crs_wkid=None,
+        target_raster=None
+        ) -> bool:
+        """True if out_raster already exists, is newer than in_raster, and 
+        matches the target CRS and cell size, i.e. re-running 
+        `_transform_rainfall_raster_job` would produce the same thing.
+        """
+        if not os.path.exists(out_raster):
+            return False
+        if os.path.getmtime(out_raster) < os.path.getmtime(in_raster):
+            return False
+
+        d = Describe(out_raster)
+        if target_crs_wkid and d.spatialReference.factoryCode != target_crs_wkid:
+            return False
+        if target_raster:
+            t = Describe(target_raster)
+            if not target_crs_wkid and d.spatialReference.factoryCode != t.spatialReference.factoryCode:
+                return False
+            if not all([
+                math.isclose(d.meanCellWidth, t.meanCellWidth),
+                math.isclose(d.meanCellHeight, t.meanCellHeight)
+            ]):
+                return False
+        return True
+
     def transform_rainfall_rasters(
         self, 
         rrc: RainfallRasterConfig, 
@@ -807,7 +1358,8 @@ class GP:
         project_raster_kwargs=None, 
         target_raster=None,
         convert_units_from="inches / 1000",
-        convert_units_to="cm"
+        convert_units_to="cm",
+        use_multiprocessing: bool = False
         ) -> RainfallRasterConfig:
         """Converts all rasters in the rainfall rasters config to geotiffs; 
         reprojects if a target crs is specified. Converts units from 
@@ -815,6 +1367,13 @@ class GP:
         
         Updates the config object accordingly.
 
+        Each raster is converted independently, so with use_multiprocessing 
+        they are converted in a pool of worker processes (one per CPU, up to 
+        one per raster). ArcPy's tools aren't thread-safe, so processes are 
+        used rather than threads; starting them (and importing ArcPy in each) 
+        takes a few seconds, so fewer than MIN_RASTERS_FOR_MULTIPROCESSING 
+        rasters are always converted in this process.
+
         Args:
             rrc (RainfallRasterConfig): Rainfall raster config object
             out_folder (str): output folder
@@ -823,55 +1382,55 @@ class GP:
             target_raster (_type_, optional): A reference raster used extent, snapping, and cell size. Defaults to None.
             convert_units_from (str, optional): convert rainfall raster values from this unit, as a Pint-compatible string. Defaults to "inches / 1000".
             convert_units_to (str, optional): convert rainfall raster values to this unit, as a Pint-compatible string. Defaults to "cm".
+            use_multiprocessing (bool, optional): convert rasters in parallel worker processes. Defaults to False.
 
         Returns:
             RainfallRasterConfig: _description_
         """
+        jobs = []
+        out_rasters = []
         for r in rrc.rasters:
 
             p = Path(r.path)
             n = f'{str(p.stem)}.tif'
             o = Path(out_folder) / n
-            self.msg(f"creating {n}")
+            out_rasters.append(str(o))
 
             # if all([convert_units_from, convert_units_to]):
                 
             #     Arithmetic(str(p), )
 
-            if target_raster:
-                tsr = Raster(target_raster)
-                tsr.extent
-                tsr.meanCellWidth
-                tmp = self._so(n,where="in_memory")
-                # tmp = str(Path(out_folder) / f'temp_{str(p.stem)}.tif')
-                with EnvManager(
-                    snapRaster=tsr,
-                    extent=tsr.extent,
-                    overwriteOutput=True
-                ):
-                    ProjectRaster(str(p), tmp, out_coor_system=tsr.spatialReference)
-                with EnvManager(
-                    extent=tsr.extent,
-                    snapRaster=tsr,
-                    overwriteOutput=True
-                ):
-                    Resample(tmp, str(o), f'{tsr.meanCellWidth} {tsr.meanCellHeight}', "BILINEAR")
-
-            if target_crs_wkid:
-                sr=SpatialReference(target_crs_wkid)
-                kwargs=dict(
-                    in_raster=str(p), 
-                    out_raster=str(o), 
-                    out_coor_system=sr
-                )
-                if project_raster_kwargs:
-                    kwargs.update(project_raster_kwargs)
-                ProjectRaster(**kwargs)
+            # skip rasters already transformed by a previous run
+            if self._rainfall_raster_is_current(str(p), str(o), target_crs_wkid, target_raster):
+                self.msg(f"{n} is up to date")
+                continue
 
-            if not all([target_crs_wkid, target_raster]): #, convert_units_from, convert_units_to]):
-                CopyRaster(str(p),str(o))
+            jobs.append(dict(
+                in_raster=str(p),
+                out_raster=str(o),
+                # in-memory workspaces are per-process, so this is usable 
+                # from a worker as well
+                temp_raster=self._so(n,where="in_memory"),
+                target_crs_wkid=target_crs_wkid,
+                project_raster_kwargs=project_raster_kwargs,
+                target_raster=target_raster
+            ))
+
+        if use_multiprocessing and len(jobs) >= MIN_RASTERS_FOR_MULTIPROCESSING:
+            max_workers = min(os.cpu_count() or 1, len(jobs))
+            self.msg(f"creating {len(jobs)} geotiffs with {max_workers} processes")
+            with _process_pool(max_workers) as executor:
+                list(executor.map(
+                    partial(_call_with_kwargs, self._transform_rainfall_raster_job),
+                    jobs
+                ))
+        else:
+            for job in jobs:
+                self.msg(f"creating {Path(job['out_raster']).name}")
+                self._transform_rainfall_raster_job(**job)
 
-            r.path = str(o)
+        for r, o in zip(rrc.rasters, out_rasters):
+            r.path = o
             r.ext="tif"
 
         rrc.root = out_folder
@@ -961,11 +1520,16 @@ class GP:
         else:
             t3 = t
 
+        # PETL tables are lazy, and this one is read several times on the way
+        # to geodata (type inference, row counts, the write itself), then 
+        # returned; without the cache, each of those would re-run the join,
+        # which sorts both tables. Cache the rows so the join runs once.
         t4 = etl\
             .cutout(t3, 'shape@x', 'shape@y')\
-            .convert(target_join_field, ftype)
+            .convert(target_join_field, ftype)\
+            .cache()
 
-        self.create_geodata_from_petl_table(t4,"x","y",output_feature_class, crs_wkid)
+        self.create_geodata_from_petl_table_in_bulk(t4,"x","y",output_feature_class, crs_wkid)
         
         return t4
         
@@ -1083,17 +1647,15 @@ class GP:
             if not soils_raster.hasRAT:
                 self.msg("Soils raster does not have an attribute table. Building...", "warning")
                 BuildRasterAttributeTable_management(soils_raster, "Overwrite")
-            # build a 2D array from the RAT
-            fields = ["Value", soils_hydrogroup_field]
-            rows = [fields]
-            # soils_raster_table = MakeTableView_management(soils_raster_path)
-            with SearchCursor(soils_raster_path, fields) as sc:
-                for row in sc:
-                    rows.append([row[0], row[1]])
+            # read the RAT into a structured array
+            soils_rat = TableToNumPyArray(soils_raster_path, ["Value", soils_hydrogroup_field])
             # turn that into a dictionary, where the key==soil hydro text and value==the raster cell value
-            lookup_from_soils = {v: k for k, v in etl.records(rows)}
+            lookup_from_soils = dict(zip(
+                soils_rat[soils_hydrogroup_field].tolist(), 
+                soils_rat["Value"].tolist()
+            ))
             # also capture a list of just the values, used to iterate conditionals later
-            soil_values = [v['Value'] for v in etl.records(rows)]
+            soil_values = soils_rat["Value"].tolist()
 
             # LANDCOVER ---------------------------------
             self.msg("Processing Landcover...")
@@ -1101,34 +1663,50 @@ class GP:
                 # read in the reference raster as a Raster object.
                 landcover_raster = Raster(landcover_raster)
             landcover_values = []
-            with SearchCursor(landcover_raster, ["Value"]) as sc:
-                for row in sc:
-                    landcover_values.append(row[0])
+            if landcover_raster.catalogPath and landcover_raster.hasRAT:
+                landcover_values = TableToNumPyArray(landcover_raster.catalogPath, ["Value"])["Value"].tolist()
+            if not landcover_values:
+                # no attribute table to read (e.g., a temporary raster), so 
+                # get the distinct cell values from the raster itself
+                cell_values = np.unique(RasterToNumPyArray(landcover_raster))
+                if landcover_raster.noDataValue is not None:
+                    cell_values = cell_values[cell_values != landcover_raster.noDataValue]
+                landcover_values = cell_values.tolist()
 
             # LOOKUP TABLE ------------------------------
             self.msg("Processing Lookup Table...")
             # read the lookup csv, clean it up, and use the lookups from above to limit it to just
             # those values in the rasters
-            t = etl\
+            lookup = etl\
                 .fromcsv(lookup_csv)\
-                .convert('utc', int)\
-                .convert('cn', int)\
-                .select('soil', lambda v: v in lookup_from_soils.keys())\
-                .convert('soil', lookup_from_soils)\
-                .select('utc', lambda v: v in landcover_values)
+                .cut('utc', 'soil', 'cn')\
+                .toarray(dtype=[('utc', int), ('soil', 'O'), ('cn', int)])
+            lookup = lookup[
+                np.isin(lookup['soil'], list(lookup_from_soils.keys())) 
+                & np.isin(lookup['utc'], landcover_values)
+            ]
             
-            # This gets us a table where we the landcover class (as a number) corresponding to the 
-            # correct value in the converted soil raster, with the corresponding curve number.
+            # This gets us a table of the landcover classes (as numbers) and soil hydro groups 
+            # found in the rasters, with the corresponding curve number. The soil hydro group is 
+            # mapped to its value in the converted soil raster below.
 
             # DETERMINE CURVE NUMBERS -------------------
             self.msg("Assigning Curve Numbers...")
-            # Use that to reassign cell values using conditional map algebra operations
-            cn_rasters = []
-            for rec in etl.records(t):
-                cn_raster_component = Con((landcover_raster == rec.utc) & (soils_raster == rec.soil), rec.cn, 0)
-                cn_rasters.append(cn_raster_component)
-
-            cn_raster = CellStatistics(cn_rasters, "MAXIMUM")
+            # Combine the landcover and soil values into a single key raster, 
+            # then reclassify the keys to curve numbers in one pass (rather 
+            # than building and combining a raster for every combination). 
+            # Combinations not in the lookup table get a curve number of 0; 
+            # if the table has more than one curve number for a combination,
+            # the highest is used.
+            k = max(soil_values, default=0) + 1
+            cn_lookup = {(lc, soil): 0 for lc in landcover_values for soil in soil_values}
+            for utc, soil, cn in zip(lookup['utc'].tolist(), lookup['soil'], lookup['cn'].tolist()):
+                key = (utc, lookup_from_soils[soil])
+                cn_lookup[key] = max(cn_lookup.get(key, 0), cn)
+            remap = RemapValue([
+                [lc * k + soil, cn] for (lc, soil), cn in cn_lookup.items()
+            ])
+            cn_raster = Reclassify(landcover_raster * k + soils_raster, "Value", remap, "NODATA")
 
             # REPROJECT THE RESULTS -------------------
             self.msg("Reprojecting and saving the results....")
@@ -1192,7 +1770,7 @@ class GP:
         print(f"...{rr['freq']} year")
         # print(rr)
         
-        rrr = Raster(rr['path'])
+        rrr = _raster(rr['path'])
 
         # calculate the average rainfall for the watershed
         with EnvManager(
@@ -1213,14 +1791,13 @@ class GP:
             # self.msg(f"DEBUG: {args}")
             ZonalStatisticsAsTable(*args)
 
-        rainfall_stats = json.loads(RecordSet(table_rainfall_avg).JSON)
+        means = _zonal_means(table_rainfall_avg)
 
         # rainfall_units = "inches"
 
-        if len(rainfall_stats['features']) > 0:
+        if len(means) > 0:
             # there shouldn't be multiple polygon features here, but this 
             # willhandle edge cases:
-            means = [f['attributes']['MEAN'] for f  in rainfall_stats['features']]
             avg_rainfall = mean(means)
             # NOAA Atlas 14 precip values are in 1000ths/inch, 
             # converted to inches using Pint:
@@ -1258,7 +1835,7 @@ class GP:
         JSON-ified arcpy.FeatureSet object as a Python dictionary. That 
         FeatureSet should only contain one point feature.
         """
-        fs = json.loads(point_geodata.JSON)
+        fs = _featureset_to_dict(point_geodata)
         # create a shed (dataclass object) from the feature
         # fprops = fs['features'][0]['attributes']
         shed = Shed(
@@ -1269,10 +1846,9 @@ class GP:
         )
 
 
-        desc_flowdir = Describe(flow_direction_raster)
         try:
             # get the crs units from the spatial ref object
-            flowdir_crs_unit = desc_flowdir.spatialReference.linearUnitName.lower()
+            flowdir_crs_unit = _linear_unit_name(flow_direction_raster)
         except:
             self.msg("Unable to get units from input raster. Falling back to meters.", arc_status="warning")
             flowdir_crs_unit = "meter"
@@ -1286,7 +1862,7 @@ class GP:
             with EnvManager(
                 snapRaster=flow_direction_raster,
                 cellSize=flow_direction_raster,
-                extent=desc_flowdir.extent, #"MAXOF"
+                extent=_extent(flow_direction_raster), #"MAXOF"
                 parallelProcessingFactor='100%'
             ):
                 # delineate one watershed
@@ -1308,28 +1884,27 @@ class GP:
             
             #ZonalGeometryAsTable(catchment_areas,"Value","output_table") # crashes like a mfer
             #cp = self.so("catchmentpolygons","timestamp","fgdb")
-            cp = self._so("shed_{}_polygon".format(shed.uid))
-            #RasterToPolygon copies our ids from self.raster_field into "gridcode"
-            simplify = "NO_SIMPLIFY"
-            if out_catchment_polygons_simplify:
-                simplify = "SIMPLIFY"
-                
-            RasterToPolygon(one_shed, cp, simplify)
-
-            # Dissolve the converted polygons, since some of the raster zones may have corner-corner links
-            #cpd = self.so("catchmentpolygonsdissolved","timestamp","fgdb")
             if out_shed_polygon:
                 shed.filepath_vector = out_shed_polygon
             else:
                 shed.filepath_vector = self._so("shed_{}_dissolved".format(shed.uid), where="fgdb")
                 # print(shed.filepath_vector)
-            
-            Dissolve(
-                in_features=cp,
-                out_feature_class=shed.filepath_vector,
-                dissolve_field="gridcode",
-                multi_part="MULTI_PART"
-            )            
+
+            #RasterToPolygon copies our ids from self.raster_field into "gridcode"
+            simplify = "NO_SIMPLIFY"
+            if out_catchment_polygons_simplify:
+                simplify = "SIMPLIFY"
+
+            # some of the raster zones may have corner-corner links, so the 
+            # polygons for each zone are combined into one multipart feature
+            # as they're created (equivalent to dissolving on gridcode, 
+            # without running Dissolve for every catchment)
+            RasterToPolygon(
+                one_shed, 
+                shed.filepath_vector, 
+                simplify, 
+                create_multipart_features="MULTIPLE_OUTER_PART"
+            )
         
         ## ---------------------------------------------------------------------
         # ANALYSIS
@@ -1343,7 +1918,7 @@ class GP:
 
             # get and sum the areas for all records 
             # (there should only be one at this point, but...)
-            areas = []
+            areas, extents = [], []
             with SearchCursor(shed.filepath_vector,["SHAPE@"]) as c:
                 for r in c:
                     # the "SHAPE@" field token returns a Geometry object.
@@ -1351,9 +1926,26 @@ class GP:
                     # units, regardless of coordinate system
                     this_area = r[0].getArea(units="SQUAREKILOMETERS")
                     areas.append(this_area)
+                    extents.append(r[0].extent)
             
             shed.area_sqkm = sum(areas)
 
+            # The Watershed output has the full extent of the flow direction 
+            # raster, so the analysis below is limited to the shed's own 
+            # extent (padded by a cell and snapped to the flow direction 
+            # raster), rather than having each GP tool process every input 
+            # raster across the whole study area.
+            shed_extent = None
+            if extents:
+                pad = _cell_size(flow_direction_raster)
+                shed_extent = Extent(
+                    min(e.XMin for e in extents) - pad,
+                    min(e.YMin for e in extents) - pad,
+                    max(e.XMax for e in extents) + pad,
+                    max(e.YMax for e in extents) + pad,
+                    spatial_reference=extents[0].spatialReference
+                )
+
 
         ## ---------------------------------------------------------------------
         # calculate average rainfall for each storm frequency
@@ -1391,12 +1983,13 @@ class GP:
                     "shed_{0}_rain_avg_{1}".format(shed.uid, rr['freq']),
                 )
                 
-                rrr = Raster(rr['path'])
+                rrr = _raster(rr['path'])
 
                 # calculate the average rainfall for the watershed
                 with EnvManager(
                     cellSizeProjectionMethod="CONVERT_UNITS",
-                    extent="MINOF",
+                    snapRaster=flow_direction_raster,
+                    extent=shed_extent or "MINOF",
                     cellSize="MINOF",
                     overwriteOutput=True,
                     # parallelProcessingFactor='100%'
@@ -1412,14 +2005,13 @@ class GP:
                     # self.msg(f"DEBUG: {args}")
                     ZonalStatisticsAsTable(*args)
 
-                rainfall_stats = json.loads(RecordSet(table_rainfall_avg).JSON)
+                means = _zonal_means(table_rainfall_avg)
 
                 # rainfall_units = "inches"
 
-                if len(rainfall_stats['features']) > 0:
+                if len(means) > 0:
                     # there shouldn't be multiple polygon features here, but this 
                     # willhandle edge cases:
-                    means = [f['attributes']['MEAN'] for f  in rainfall_stats['features']]
                     avg_rainfall = mean(means)
                     # NOAA Atlas 14 precip values are in 1000ths/inch, 
                     # converted to inches using Pint:
@@ -1452,7 +2044,7 @@ class GP:
                 snapRaster=flow_direction_raster,
                 cellSize=flow_direction_raster,
                 overwriteOutput=True,
-                extent=one_shed.extent,
+                extent=shed_extent or one_shed.extent,
                 parallelProcessingFactor='100%'
             ):
 
@@ -1461,27 +2053,31 @@ class GP:
                 # This saves a ton of time over deriving the flow length raster.
                 if flow_length_raster:
                     self.msg("calculating flow length (using provided flow length raster)")
-                    clipped_flowlen = SetNull(IsNull(one_shed), Raster(flow_length_raster))
-                    desc_flowflen = Describe(flow_length_raster)
                     try:
                         # get the crs units from the spatial ref object
-                        flowlen_crs_unit = desc_flowflen.spatialReference.linearUnitName.lower()
+                        flowlen_crs_unit = _linear_unit_name(flow_length_raster)
                     except:
                         self.msg("Unable to get units from input flow length raster. Falling back to meters.", arc_status="warning")
                         flowlen_crs_unit = "meter"
-                    max_fl = clipped_flowlen.maximum - clipped_flowlen.minimum
-                    shed.max_fl = units.Quantity(max_fl, flowlen_crs_unit).m_as("meter")
+                    # read just the shed's window of the flow length raster 
+                    # into NumPy where it's on the same grid as the shed...
+                    max_fl = None
+                    if shed_extent:
+                        max_fl = _zonal_range(one_shed, _raster(flow_length_raster), shed_extent)
+                    # ...otherwise, use map algebra
+                    if max_fl is None:
+                        clipped_flowlen = SetNull(IsNull(one_shed), _raster(flow_length_raster))
+                        max_fl = clipped_flowlen.maximum - clipped_flowlen.minimum
+                    shed.max_fl = get_units().Quantity(max_fl, flowlen_crs_unit).m_as("meter")
                 
                 # otherwise, generate a flow length raster for the shed and get 
                 # its maximum value
                 else:
                     self.msg("calculating flow length for catchment area")
                     # clip the flow direction raster to the catchment area (zone value)
-                    clipped_flowdir = SetNull(IsNull(one_shed), Raster(flow_direction_raster))
-
-                    Raster(clipped_flowdir).save(
-                        self._so("shed_{0}_clipped_flowdir".format(shed.uid))
-                    )
+                    # (the clipped raster is only an input to FlowLength, 
+                    # so it isn't saved)
+                    clipped_flowdir = SetNull(IsNull(one_shed), _raster(flow_direction_raster))
                     
                     # calculate flow length
                     flow_len_raster = FlowLength(clipped_flowdir, "UPSTREAM")
@@ -1490,7 +2086,7 @@ class GP:
                     #TODO: convert length to ? using leng_conv_factor (detected from the flow direction raster)
                     #fl_max = fl_max * leng_conv_factor
                     if flow_len_raster.maximum:
-                        shed.max_fl = units.Quantity(flow_len_raster.maximum, flowdir_crs_unit).m_as("meter")
+                        shed.max_fl = get_units().Quantity(flow_len_raster.maximum, flowdir_crs_unit).m_as("meter")
                     else:
                         shed.max_fl = 0
 
@@ -1509,7 +2105,8 @@ class GP:
             
             with EnvManager(
                 cellSizeProjectionMethod="PRESERVE_RESOLUTION",
-                extent="MINOF",
+                snapRaster=flow_direction_raster,
+                extent=shed_extent or "MINOF",
                 cellSize=one_shed,
                 overwriteOutput=True,
                 parallelProcessingFactor='100%'
@@ -1517,16 +2114,15 @@ class GP:
                 ZonalStatisticsAsTable(
                     one_shed, 
                     self.raster_field, 
-                    Raster(slope_raster),
+                    _raster(slope_raster),
                     table_slope_avg, 
                     "DATA",
                     "MEAN"
                 )
                 
-                slope_stats = json.loads(RecordSet(table_slope_avg).JSON)
-                if len(slope_stats['features']) > 0:
+                means = _zonal_means(table_slope_avg)
+                if len(means) > 0:
                     # in the event we get more than one record here, we avg the avg                
-                    means = [f['attributes']['MEAN'] for f in slope_stats['features']]
                     shed.avg_slope_pct = mean(means)
 
         
@@ -1539,11 +2135,12 @@ class GP:
             
             table_cn_avg = self._so("shed_{0}_cn_avg".format(shed.uid))
 
-            rcn = Raster(curve_number_raster)
+            rcn = _raster(curve_number_raster)
 
             with EnvManager(
                 # cellSizeProjectionMethod="PRESERVE_RESOLUTION",
-                extent="MINOF",
+                snapRaster=flow_direction_raster,
+                extent=shed_extent or "MINOF",
                 cellSize=rcn.meanCellWidth,
                 overwriteOutput=True,
                 parallelProcessingFactor='100%'
@@ -1556,12 +2153,10 @@ class GP:
                     "DATA",
                     "MEAN"
                 )
-                cn_stats = json.loads(RecordSet(table_cn_avg).JSON)
-                
+                means = _zonal_means(table_cn_avg)
 
-                if len(cn_stats['features']) > 0:
+                if len(means) > 0:
                     # in the event we get more than one record here, we avg the avg
-                    means = [f['attributes']['MEAN'] for f in cn_stats['features']]
                     shed.avg_cn = mean(means)
         
 
@@ -1605,55 +2200,31 @@ class GP:
         #-----------------------------------------------------------------------
         # add the shed feature(s) to the shed model instance
         if save_featureset:
-            shed.shed_geom = json.loads(FeatureSet(shed.filepath_vector).JSON)
+            shed.shed_geom = _featureset_to_dict(FeatureSet(shed.filepath_vector))
 
         return shed
 
     @staticmethod
     def _delineation_and_analysis_in_parallel_job(
-        cls,
-        point: dict,
-        pour_point_field: str,
-        flow_direction_raster: str,
-        flow_length_raster: str,
-        slope_raster: str,
-        curve_number_raster: str,
-        precip_src_config: dict,
-        out_shed_polygons_simplify: bool = False,
-        override_skip: bool = False
-    ):
-
-        point = DrainItPointSchema().load(point)
-
-        if not override_skip and not point.include:
-
-            
-
-            # create a FeatureSet for each individual Point object
-            # this lets us keep our Point objects around while feeding
-            # the GP tools a native input format.
-            point_geodata = cls.create_geodata_from_points([point], as_dict=False)
-
-            # delineate a catchment/basin/watershed ("shed") and derive 
-            # some data from that, storing it in a Shed object.
-            shed = cls._delineate_and_analyze_one_catchment(
-                cls,
-                uid=point.uid,
-                group_id=point.group_id,
-                point_geodata=point_geodata,
-                pour_point_field=pour_point_field,
-                flow_direction_raster=flow_direction_raster,
-                flow_length_raster=flow_length_raster,
-                slope_raster=slope_raster,
-                curve_number_raster=curve_number_raster,
-                rainfall_rasters=precip_src_config['rasters'],
-                out_shed_polygon=None,
-                out_catchment_polygons_simplify=out_shed_polygons_simplify
-            )
-
-            point.shed = shed
-
-        return DrainItPointSchema().dump(point)
+        point: DrainItPoint, 
+        **kwargs
+        ) -> Shed:
+        """delineates and analyzes the catchment for one point in a worker 
+        process. Keyword arguments are passed to 
+        `_delineate_and_analyze_one_catchment`. Points and Sheds are plain 
+        dataclasses, so they go to and from the worker as-is.
+        """
+        gp = GP(None)
+        # create a FeatureSet for the individual Point object
+        point_geodata = gp.create_geodata_from_drainitpoints([point], as_dict=False)
+        shed = gp._delineate_and_analyze_one_catchment(
+            uid=point.uid,
+            group_id=point.group_id,
+            point_geodata=point_geodata,
+            **kwargs
+        )
+        Delete('memory')
+        return shed
 
     def delineation_and_analysis_in_parallel(
         self,
@@ -1672,39 +2243,49 @@ class GP:
         ) -> Tuple[DrainItPoint]:
 
         shed_geodata = []
+        _clear_dataset_caches()
 
-        # if use_multiprocessing:
-
-        #     args = [
-        #         (
-        #             DrainItPointSchema().dump(p),
-        #             pour_point_field,
-        #             flow_direction_raster,
-        #             flow_length_raster,
-        #             slope_raster,
-        #             curve_number_raster,
-        #             precip_src_config,
-        #             out_shed_polygons,
-        #             out_shed_polygons_simplify,
-        #             override_skip
-        #         )
-        #         for p in points
-        #     ]
-            
-        #     with WorkerPool() as pool:
-        #         results = pool.map(
-        #             self._delineation_and_analysis_in_parallel_job,
-        #             args
-        #         )
-
-        #     # new points list created here:
-        #     points = []
-        #     for point in results:
-        #         pt = DrainItPointSchema().load(point)
-        #         points.append(pt)
-        #         shed_geodata.append(pt.shed.filepath_vector)
+        # with multiprocessing, each catchment is delineated and analyzed in 
+        # one of a pool of worker processes (one per CPU, up to one per point)
+        if use_multiprocessing:
 
-        # else:
+            points_to_analyze = [p for p in points if override_skip or p.include]
+            if not points_to_analyze:
+                return points
+            max_workers = min(os.cpu_count() or 1, len(points_to_analyze))
+            self.msg(f"Analyzing {len(points_to_analyze)} points with {max_workers} processes")
+
+            job = partial(
+                self._delineation_and_analysis_in_parallel_job,
+                pour_point_field=pour_point_field,
+                flow_direction_raster=flow_direction_raster,
+                flow_length_raster=flow_length_raster,
+                slope_raster=slope_raster,
+                curve_number_raster=curve_number_raster,
+                rainfall_rasters=precip_src_config['rasters'],
+                out_shed_polygon=None,
+                out_catchment_polygons_simplify=out_shed_polygons_simplify
+            )
+            # the workers' scratch workspaces (which hold each shed's 
+            # polygon) are created in one temporary folder, removed once the 
+            # sheds have been merged
+            scratch_root = mkdtemp(prefix="drainit_")
+            try:
+                with _process_pool(
+                    max_workers, 
+                    initializer=partial(_init_analysis_worker, scratch_root)
+                ) as executor:
+                    for point, shed in zip(points_to_analyze, executor.map(job, points_to_analyze)):
+                        point.shed = shed
+                        shed_geodata.append(shed.filepath_vector)
+
+                # merge the sheds into a single layer
+                if out_shed_polygons:
+                    Merge(shed_geodata, out_shed_polygons)
+            finally:
+                shutil.rmtree(scratch_root, ignore_errors=True)
+
+            return points
 
         # for each Point in the input points list
         # for point in tqdm(points):
@@ -1,29 +1,33 @@
 import json
+import sys
 import click
 from typing import List
 from pathlib import Path
 from collections import OrderedDict
 from dataclasses import fields
+from functools import lru_cache
 import pdb
 
-import pint
 import petl as etl
 from marshmallow import ValidationError
 
 from ..models import (
-    NaaccCulvertSchema,
-    DrainItPoint
+    NaaccCulvert,
+    DrainItPoint,
+    get_schema
 )
 from ..calculators.capacity import (
     Capacity,
-    CapacitySchema,
     calc_culvert_capacity,
-    CAPACITY_NUMERIC_FIELDS
+    calculate_capacities,
+    CAPACITY_NUMERIC_FIELDS,
+    CAPACITY_FIELD_NAMES
 )
 from ..utils import (
     validate_petl_record_w_schema, 
     convert_value_via_xwalk,
-    read_csv_with_petl
+    read_csv_with_petl,
+    get_units
 )
 from .naacc_config import (
     NAACC_HEADER_LOOKUP, 
@@ -31,12 +35,47 @@ from .naacc_config import (
     NAACC_INLET_TYPE_CROSSWALK
 )
 
-units = pint.UnitRegistry()
-
 # pi. Note that Cornell source script used a precision 5 float instead of 
 # Python's available math.pi constant, the latter likely being more precise
 PI = 3.14159 #math.pi
 
+# NAACC field -> Capacity field crosswalk, paired with the numeric type 
+# the value is cast to (None for non-numeric fields). Built once, since 
+# it's used for every row.
+NAACC_TO_CAPACITY_FIELD_CASTS = tuple(
+    (n_field, cap_field, dict(CAPACITY_NUMERIC_FIELDS).get(cap_field))
+    for n_field, cap_field in NAACC_HEADER_LOOKUP.items()
+)
+
+# NAACC text fields with a small vocabulary of values (plus road names, which
+# repeat along a road). Values in these are interned on ingest so that the 
+# rows share one copy of each string instead of one per row.
+NAACC_INTERNED_FIELDS = (
+    'Material',
+    'Inlet_Type',
+    'Inlet_Structure_Type',
+    'Outlet_Structure_Type',
+    'Crossing_Type',
+    'Road'
+)
+
+def _intern(value):
+    """intern string values; return anything else as-is"""
+    if value.__class__ is str:
+        return sys.intern(value)
+    return value
+
+@lru_cache(maxsize=8192, typed=True)
+def _cast_number(number_type, value):
+    """cast a value to a number type, returning the value as-is if it can't 
+    be cast. Memoized, since NAACC tables repeat the same numeric strings 
+    over and over.
+    """
+    try:
+        return number_type(value)
+    except (ValueError, TypeError):
+        return value
+
 
 class NaaccEtl:
 
@@ -66,8 +105,8 @@ class NaaccEtl:
         self.naacc_uid = naacc_uid
         self.naacc_groupid = naacc_groupid
 
-        self.naacc_culvert_schema = NaaccCulvertSchema()
-        self.capacity_schema = CapacitySchema()
+        self.naacc_culvert_schema = get_schema(NaaccCulvert)
+        self.capacity_schema = get_schema(Capacity)
         
         # self.table = self.read_naacc_csv_to_petl(
         #     self.naacc_csv_file,
@@ -95,14 +134,14 @@ class NaaccEtl:
         
         r = OrderedDict({i[0]: i[1] for i in zip(row.flds, row)})
         # print(capacity_numeric_fields)
-        for n_field, cap_field in NAACC_HEADER_LOOKUP.items():
+        for n_field, cap_field, number_type in NAACC_TO_CAPACITY_FIELD_CASTS:
             # for numeric fields, cast values to the specified python type based on the lookup above
-            if cap_field in CAPACITY_NUMERIC_FIELDS.keys():
-                number_type = CAPACITY_NUMERIC_FIELDS[cap_field]
+            if number_type is not None:
+                value = r.get(n_field)
                 try:
-                    r[cap_field] = number_type(r[n_field])
-                except:
-                    r[cap_field] = r.get(n_field)
+                    r[cap_field] = _cast_number(number_type, value)
+                except TypeError: # unhashable value
+                    r[cap_field] = value
             # otherwise just copy them over
             else:
                 r[cap_field] = r.get(n_field)
@@ -239,6 +278,7 @@ class NaaccEtl:
 
         # convert the incoming PETL.Record object to a dictionary
         row = OrderedDict({i[0]: i[1] for i in zip(row.flds, row)})
+        units = get_units()
         
         # ----------------------------------------------------------------------
         # safety valve: minimal processing if record is invalid
@@ -673,10 +713,16 @@ class NaaccEtl:
         # which is updated with validation error messages
         validated_table_fieldmap = OrderedDict([(h, h) for h in etl.header(raw_table)])
         validated_table_fieldmap['validation_errors'] = lambda rec: validate_petl_record_w_schema(rec, self.naacc_culvert_schema)
-        # run the transform
+        # run the transform. PETL tables are lazy, so without the cache every
+        # pass over this table or those derived from it (row counts, the
+        # hydration steps, CSV outputs, point generation) would re-validate
+        # each row against the schema. Cache the rows so that happens once.
+        interned_fields = [f for f in NAACC_INTERNED_FIELDS if f in validated_table_fieldmap]
         validated_table = etl\
             .replaceall(raw_table, "", None)\
-            .fieldmap(validated_table_fieldmap)
+            .convert(interned_fields, _intern)\
+            .fieldmap(validated_table_fieldmap)\
+            .cache()
         
         if has_rows:
             bad = etl.selectnotnone(validated_table, 'validation_errors')
@@ -746,6 +792,7 @@ class NaaccEtl:
         click.echo("Generating {0} points from table".format(len(src_points)))
 
         points = []
+        calculable = []
         for idx, r in enumerate(src_points):
             
             kwargs = dict(
@@ -787,17 +834,16 @@ class NaaccEtl:
             # empty. In order to take advantage of serialization mechanisms we 
             # already have without getting hung up on validation, we empty the 
             # dict of any keys with None values:
-            capacity_fields = [f.name for f in fields(Capacity)]
-            c = {k:v for k,v in r.items() if v is not None and k in capacity_fields}
+            c = {k:v for k,v in r.items() if v is not None and k in CAPACITY_FIELD_NAMES}
             
             # once loaded via the serializer, those None values will be
             # replaced with the defaults spec'd in the models (usually None)
 
             try:
                 capacity = self.capacity_schema.load(data=c, partial=True)
-                # calculate capacity here
-                capacity.calculate()
-                kwargs['capacity'] = capacity                
+                # capacity is calculated for all points at once, below
+                kwargs['capacity'] = capacity
+                calculable.append(capacity)
             except:
                 # print("schema error | CAPACITY | Survey/Culvert {0}/{1}: {2}".format(r["Survey_Id"], r["Naacc_Culvert_Id"], e))
                 kwargs['include'] = False
@@ -807,5 +853,8 @@ class NaaccEtl:
                     pass
             p = DrainItPoint(**kwargs)
             points.append(p)
+
+        # calculate capacity for every point that loaded
+        calculate_capacities(calculable)
         
         self.points = points
\ No newline at end of file
@@ -6,6 +6,7 @@ from pathlib import Path
 from copy import deepcopy
 from io import BytesIO
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 
 from dataclasses import asdict
 
@@ -16,7 +17,7 @@ from codetiming import Timer
 from tqdm import tqdm
 
 # application
-from ..models import RainfallRasterConfig, RainfallRaster, RainfallRasterConfigSchema
+from ..models import RainfallRasterConfig, RainfallRaster, get_schema
 from ..config import (
     QP_PREFIX,
     NOAA_RAINFALL_REGION_LOOKUP,
@@ -130,6 +131,43 @@ def retrieve_noaa_rainfall_pf_est(
     print(d)
     return d
 
+def _retrieve_noaa_rainfall_raster(freq, data, url, out_folder, raster_format):
+    """download and extract the NOAA rainfall raster for a single frequency.
+    Used by retrieve_noaa_rainfall_rasters, which runs these concurrently.
+
+    Returns a list of RainfallRaster objects for the extracted rasters (empty
+    if the download failed)
+    """
+    rasters = []
+    out_path = Path(out_folder)
+
+    # make the request
+    r = requests.post(url, data=data, stream=True)
+    if r.ok:
+        try:
+            # extract the response to the output folder
+            z = zipfile.ZipFile(BytesIO(r.content))
+            z.extractall(out_folder)
+
+            # list files in the zip folder
+            files_from_zip = z.NameToInfo.keys()
+
+            # create a lookup table that will help us find these later
+            for f in files_from_zip:
+                p = out_path / f
+                ext = p.suffix
+                # freq = re.findall(r'\d+', f)[0]
+                if ext == raster_format:
+                    rasters.append(
+                        RainfallRaster(str(p), freq, ext)
+                    )
+        except Exception as e:
+            print("Download failed for {0} ({1}).\n{2}".format(data["freq"], data, e))
+    else:
+        print("Download failed for {0} ({1})\n {2}".format(data["freq"], data, r.content))
+    
+    return rasters
+
 def retrieve_noaa_rainfall_rasters(
     out_folder,
     out_file_name="rainfall_rasters_config.json",
@@ -139,7 +177,8 @@ def retrieve_noaa_rainfall_rasters(
     ser="pds",
     dur="24h",
     frequencies=FREQUENCIES,
-    raster_format=".asc"
+    raster_format=".asc",
+    max_workers=4
     ) -> RainfallRasterConfig:
     """Download NOAA rainfall rasters from the Hydrometeorological Design Studies
     Center Precipitation Frequency Data Server (PFDS).
@@ -164,6 +203,8 @@ def retrieve_noaa_rainfall_rasters(
     :type frequencies: list, optional
     :param raster_format: format of the raster files returned by the API, defaults to "asc"
     type raster_format: str, optional
+    :param max_workers: number of frequencies to download concurrently, defaults to 4
+    :type max_workers: int, optional
     :raises Exception: [description]
     :return: a dataclass with properties indicating the location of downloaded files + useful descriptors
     :rtype: RainfallRasterConfig
@@ -259,42 +300,29 @@ def retrieve_noaa_rainfall_rasters(
     c = RainfallRasterConfig(root=out_folder)
     out_path = Path(out_folder)
 
-    # for freq in tqdm(frequencies):
+    # assemble the kwargs for the request for each frequency
+    requests_data = []
     for freq in frequencies:
-        # assemble the kwargs for the request
         data = deepcopy(post_kwargs)
         data["freq"] = f"{freq}yr"
-
-        # make the request
-        r = requests.post(url, data=data, stream=True)
-        if r.ok:
-            try:
-                # extract the response to the output folder
-                z = zipfile.ZipFile(BytesIO(r.content))
-                z.extractall(c.root)
-
-                # list files in the zip folder
-                files_from_zip = z.NameToInfo.keys()
-
-                # create a lookup table that will help us find these later
-                for f in files_from_zip:
-                    p = out_path / f
-                    ext = p.suffix
-                    # freq = re.findall(r'\d+', f)[0]
-                    if ext == raster_format:
-                        c.rasters.append(
-                            RainfallRaster(str(p), freq, ext)
-                        )
-            except Exception as e:
-                print("Download failed for {0} ({1}).\n{2}".format(data["freq"], data, e))
-        else:
-            print("Download failed for {0} ({1})\n {2}".format(data["freq"], data, r.content))
+        requests_data.append(data)
+
+    # downloads are I/O bound, so they're run concurrently. Results come back
+    # in the same order as the frequencies.
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(
+            lambda freq, data: _retrieve_noaa_rainfall_raster(freq, data, url, c.root, raster_format),
+            frequencies,
+            requests_data
+        )
+        for rasters in results:
+            c.rasters.extend(rasters)
 
     # out_full_path = out_path / "{0}_{1}.json".format(out_file_name, study)
 
     with open(out_path / out_file_name, 'w') as fp:
         json.dump(
-            RainfallRasterConfigSchema().dump(asdict(c)),
+            get_schema(RainfallRasterConfig).dump(asdict(c)),
             fp
         )
 
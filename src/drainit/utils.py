@@ -1,10 +1,33 @@
+import json
+import sys
 from collections.abc import Mapping, Iterable
 from dataclasses import is_dataclass, fields
-from functools import partial, wraps
+from functools import partial, wraps, lru_cache
 from chardet.universaldetector import UniversalDetector
 
 import petl as etl
 
+try:
+    import orjson
+except ModuleNotFoundError:
+    orjson = None
+
+@lru_cache(maxsize=None)
+def get_units():
+    """returns the package's shared pint UnitRegistry, creating it on first 
+    use. Building a registry parses pint's unit definitions, which takes a 
+    fraction of a second, so one is shared rather than one per module.
+
+    :return: pint unit registry
+    :rtype: pint.UnitRegistry
+    """
+    import pint
+    return pint.UnitRegistry()
+
+# keyword args for @dataclass that give the class __slots__, where supported
+# (Python 3.10+). On older Pythons, dataclasses fall back to instance dicts.
+DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
 def fxio(preprocess=None, postprocess=None):
     """https://stackoverflow.com/q/55564330
 
@@ -127,6 +150,55 @@ def get_type(typ, fallback=str):
     return typ
 
 
+def read_json(filepath):
+    """reads a JSON file from disk. Uses orjson when it is available, which
+    parses directly from bytes and avoids most of the intermediate allocations
+    made by the standard library parser on large configs. Files orjson won't
+    parse, such as configs with NaN values written by `write_json`, are read
+    with the standard library instead.
+
+    :param filepath: path to a JSON file
+    :type filepath: str | Path
+    :return: the parsed JSON
+    :rtype: dict | list
+    """
+    with open(filepath, 'rb') as fp:
+        return parse_json(fp.read())
+
+def parse_json(s):
+    """parses a JSON string (or bytes). Uses orjson when it is available, 
+    which is several times faster than the standard library on large 
+    payloads, such as the JSON representation of an ArcPy FeatureSet. 
+    Falls back to the standard library for documents orjson rejects (e.g., 
+    those containing NaN or Infinity), so the result doesn't depend on 
+    whether orjson is installed.
+
+    :param s: JSON document
+    :type s: str | bytes
+    :return: the parsed JSON
+    :rtype: dict | list
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(s)
+
+def write_json(obj, filepath):
+    """writes a JSON-serializable object to disk with the standard library.
+    orjson isn't used here: it writes NaN (e.g., a missing peak flow) as 
+    null, so configs would read back differently depending on whether it 
+    was installed.
+
+    :param obj: the object to serialize
+    :type obj: dict | list
+    :param filepath: path to the output JSON file
+    :type filepath: str | Path
+    """
+    with open(filepath, 'w') as fp:
+        json.dump(obj, fp)
+
 def read_csv_with_petl(source, **kwargs):
     """reads a CSV into PETL, handling different file encodings to ensure a
     clean result (i.e., no BOM in the header).
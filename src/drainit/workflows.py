@@ -2,16 +2,17 @@
 """
 
 import json
+import os
 from copy import deepcopy
 from pathlib import Path
-from dataclasses import asdict, replace, fields
+from dataclasses import asdict, fields
 from typing import Tuple, List
 from tempfile import mkdtemp
 from collections import Counter, OrderedDict
 
+import numpy
 import petl as etl
 import click
-import pint
 from tqdm import tqdm
 from codetiming import Timer
 from marshmallow import INCLUDE
@@ -21,19 +22,52 @@ from .models import (
     WorkflowConfig, 
     WorkflowConfigSchema, 
     RainfallRasterConfig, 
-    RainfallRasterConfigSchema,
     PeakFlow01Schema,
     DrainItPoint,
-    DrainItPointSchema,
-    NaaccCulvert
+    NaaccCulvert,
+    build_dataclass,
+    calculate_tc_array,
+    derive_rainfall_analytics_batch,
+    get_schema
 )
-from .calculators import runoff, capacity, overflow
+from .calculators import runoff, capacity, overflow, pipeline
 from .settings import USE_ESRI
 from .services.gp import GP
 from .services.noaa import retrieve_noaa_rainfall_rasters, retrieve_noaa_rainfall_pf_est
 from .services.naacc import NaaccEtl
 from .config import FREQUENCIES
-from .utils import get_type
+from .utils import get_type, get_units, read_json, write_json
+
+__all__ = [
+    'WorkflowManager',
+    'NaaccDataIngest',
+    'NaaccDataSnapping',
+    'RainfallDataGetter',
+    'CulvertCapacity'
+]
+
+# ------------------------------------------------------------------------------
+# Config validation cache
+
+# config files that have been loaded and validated in this session, keyed by
+# file, and kept in least-recently-used order. Bounded, since configs with 
+# many points can be large.
+_VALIDATED_CONFIGS = OrderedDict()
+_VALIDATED_CONFIGS_MAXSIZE = 16
+
+def _config_file_key(config_json_filepath) -> tuple:
+    """identifies a config file by its path and when it was last modified, so 
+    that any change to the file invalidates the key.
+    """
+    stat = os.stat(config_json_filepath)
+    return (os.path.abspath(config_json_filepath), stat.st_mtime_ns, stat.st_size)
+
+def _remember_validated_config(key, config):
+    # store a copy, so later changes to the workflow's config don't leak back
+    _VALIDATED_CONFIGS[key] = deepcopy(config)
+    _VALIDATED_CONFIGS.move_to_end(key)
+    while len(_VALIDATED_CONFIGS) > _VALIDATED_CONFIGS_MAXSIZE:
+        _VALIDATED_CONFIGS.popitem(last=False)
 
 # ------------------------------------------------------------------------------
 # Workflow Base Class
@@ -49,6 +83,7 @@ class WorkflowManager:
         config_json_filepath=None,
         use_esri=USE_ESRI, 
         use_multiprocessing=False,
+        trust_config=False,
         **kwargs
     ):
         # print("WorkflowManager")
@@ -59,6 +94,9 @@ class WorkflowManager:
 
         # if any config files provided, load here. This will replace the
         # config object entirely
+        # configs we wrote ourselves (or that the caller vouches for) skip 
+        # schema validation on load
+        self.trust_config = trust_config
         self.config_json_filepath = config_json_filepath
         self.load_config()
         # click.echo(self.config)
@@ -67,7 +105,8 @@ class WorkflowManager:
         # use the provided keyword arguments to update it, overriding any that
         # were provided in the JSON file.
         # print(kwargs)
-        self.config = replace(self.config, **kwargs)
+        if kwargs:
+            self.config.bulk_update(**kwargs)
         # (individual workflows that subclass WorkflowManager handle whether or 
         # not the needed kwargs are actually present)
 
@@ -77,7 +116,7 @@ class WorkflowManager:
         self.using_esri = use_esri
         self.using_wbt = not use_esri
         self.use_multiprocessing = use_multiprocessing
-        self.units = pint.UnitRegistry()
+        self.units = get_units()
         self.gp = GP(self.config)
 
         # code.interact(local=locals())
@@ -88,6 +127,10 @@ class WorkflowManager:
         Note that validation via WorkflowConfigSchema will fail if the JSON has 
         been manually changed outside in a way that doesn't follow the schema
         (i.e., it has to serialize correctly to load)
+
+        Configs loaded with `trust_config=True` (e.g., ones this package just 
+        wrote, that the caller knows haven't been edited) are instantiated 
+        directly, without re-validating.
         """
 
         # ----------------------------------------------------------------------
@@ -106,10 +149,24 @@ class WorkflowManager:
         # reads from disk, validates, and stores
         if cjf:
             click.echo("Reading general config from JSON file")
-            with open(cjf) as fp:
-                config_as_dict = json.load(fp)
+            # files that have already been validated in this session (and 
+            # haven't changed since) are copied from the cache instead
+            validated_key = _config_file_key(cjf)
+            validated_config = _VALIDATED_CONFIGS.get(validated_key)
+            if validated_config is not None:
+                _VALIDATED_CONFIGS.move_to_end(validated_key)
+                self.config = deepcopy(validated_config)
+            else:
+                config_as_dict = read_json(cjf)
                 # print(config_as_dict)
-            self.config = WorkflowConfigSchema().load(config_as_dict, partial=True, unknown=INCLUDE)
+                # (files written by earlier versions carry a marker that 
+                # is no longer used)
+                config_as_dict.pop("_drainit_signed", None)
+                if self.trust_config:
+                    self.config = build_dataclass(WorkflowConfig, config_as_dict)
+                else:
+                    self.config = get_schema(WorkflowConfig).load(config_as_dict, partial=True, unknown=INCLUDE)
+                    _remember_validated_config(validated_key, self.config)
 
         # ----------------------------------------------------------------------
         # Rainfall Raster Config (nested within the workflow config)
@@ -117,9 +174,8 @@ class WorkflowManager:
 
         if self.config.precip_src_config_filepath is not None:
             click.echo("Reading rainfall config from JSON file")
-            with open(self.config.precip_src_config_filepath) as fp:
-                rainfall_config_as_dict = json.load(fp)
-                self.config.precip_src_config = RainfallRasterConfigSchema().load(rainfall_config_as_dict)            
+            rainfall_config_as_dict = read_json(self.config.precip_src_config_filepath)
+            self.config.precip_src_config = get_schema(RainfallRasterConfig).load(rainfall_config_as_dict)
 
         return self        
     
@@ -130,12 +186,14 @@ class WorkflowManager:
         if our code is doing something wrong.
         """
 
-        self.config_json_filepath = Path(config_json_filepath)
+        # only coerce to a Path if we haven't already
+        if not isinstance(config_json_filepath, Path):
+            config_json_filepath = Path(config_json_filepath)
+        self.config_json_filepath = config_json_filepath
 
-        c = WorkflowConfigSchema().dump(self.config)
+        c = get_schema(WorkflowConfig).dump(self.config)
         # print(c)
-        with open(config_json_filepath, 'w') as fp:
-            json.dump(c, fp)
+        write_json(c, self.config_json_filepath)
 
         return self
 
@@ -245,7 +303,7 @@ class NaaccDataIngest(WorkflowManager):
         field_types_lookup.update({'validation_errors': str})#, 'include': int})
         
         # save the PETL-ified NAACC table to a geodata table (default: Esri FGDB feature class)
-        featureset_json = self.gp.create_geodata_from_petl_table(
+        featureset_json = self.gp.create_geodata_from_petl_table_in_bulk(
             petl_table=self.naacc_table,
             field_types_lookup=field_types_lookup,
             x_column=self.naacc_x, 
@@ -395,7 +453,7 @@ class RainfallDataGetter(WorkflowManager):
                 target_raster=self.target_raster
             )
         # save the config to JSON
-        rrc = RainfallRasterConfigSchema().dump(asdict(rainfall_raster_config2))
+        rrc = get_schema(RainfallRasterConfig).dump(asdict(rainfall_raster_config2))
         with open(self.out_path, 'w') as fp:
             json.dump(rrc, fp)
             self.gp.msg(f"Saving configuration file to: {self.out_path}")
@@ -415,8 +473,8 @@ class CurveNumberMaker(WorkflowManager):
     Output:
         * a curve number raster
     """
-    def __init__(self):  
-        pass
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
 
 
 # ------------------------------------------------------------------------------
@@ -628,12 +686,14 @@ class CulvertCapacity(WorkflowManager):
         )
         
         # save those to the config
-        # ...as a list of Drain-It Point objects:
-        self.config.points = points
-        # ...as the geo/json (GeoJSON or Geoservices JSON depending on the GP module used)
-        self.config.points_features = points_features
-        # the spatial ref of the points
-        self.config.points_spatial_ref_code = points_spatial_ref_code
+        self.config.bulk_update(
+            # ...as a list of Drain-It Point objects:
+            points=points,
+            # ...as the geo/json (GeoJSON or Geoservices JSON depending on the GP module used)
+            points_features=points_features,
+            # the spatial ref of the points
+            points_spatial_ref_code=points_spatial_ref_code
+        )
 
         return self.config.points, self.config.points_features
     
@@ -651,66 +711,76 @@ class CulvertCapacity(WorkflowManager):
 
         # for pt in tqdm(points_to_analyze, desc="analyzing points"):
         self.gp.msg("analyzing points")
+        # Copy rainfall intervals from point.shed to point.analytics list.
+        # This is object is used for peak-flow and overflow calculations per
+        # rainfall frequency. Rainfall is also returned as a (points x 
+        # frequencies) array in cm, NaN-padded for points with fewer 
+        # frequencies.
+        rainfall = derive_rainfall_analytics_batch(points_to_analyze)
+
         for pt in points_to_analyze:
-        
 
             # print(pt.uid, pt.group_id)
 
-            # Copy rainfall intervals from point.shed to point.analytics list.
-            # This is object is used for peak-flow and overflow calculations per
-            # rainfall frequency.
-            pt.derive_rainfall_analytics()
-
             # ------------------
             # CAPACITY
             # Set crossing capacity equal to culvert capacity
             # (later we re-evaluate if the point is part of a multi-culvert crossing)
             pt.capacity.crossing_capacity = pt.capacity.culvert_capacity
 
-            # ------------------
-            # PEAK FLOW
-            # calculate time of concentration for the point's shed
-            pt.shed.calculate_tc()
+        # ------------------
+        # TIME OF CONCENTRATION
+        # calculate time of concentration for all of the points' sheds
+        sheds = self.config.shed_arrays(points_to_analyze)
+        sheds['tc_hr'] = calculate_tc_array(sheds['max_fl'], sheds['avg_slope_pct'], sheds['tc_hr'])
+        for pt, tc_hr in zip(points_to_analyze, sheds['tc_hr'].tolist()):
+            if not numpy.isnan(tc_hr):
+                pt.shed.tc_hr = tc_hr
+
+        # ------------------
+        # PEAK FLOW and OVERFLOW
+        # calculated for all points and rainfall frequencies at once, from the
+        # rainfall array. Time of concentration is derived here for any shed
+        # that doesn't have one. Overflow is NaN where either capacity or 
+        # peak flow wasn't calculated.
+        peakflows, tcs, overflows, _ = pipeline.evaluate(
+            culvert_capacity=[pt.capacity.culvert_capacity for pt in points_to_analyze],
+            avg_rainfall_cm=rainfall,
+            basin_area_sqkm=sheds['area_sqkm'],
+            avg_cn=sheds['avg_cn'],
+            tc_hr=sheds['tc_hr'],
+            mean_slope_pct=sheds['avg_slope_pct'],
+            max_flow_length_m=sheds['max_fl']
+        )
+        tcs = [None if numpy.isnan(tc) else tc for tc in tcs.tolist()]
+
+        for i, pt in enumerate(points_to_analyze):
             # for each rainfall frequency
-            for freq in pt.analytics:
-                # print("freq", freq.frequency)
-                # instantiate a Runoff dataclass within 
-                freq.peakflow = runoff.Runoff()
-                # add in the tc that has already been calculated for the shed
-                freq.peakflow.time_of_concentration_hr = pt.shed.tc_hr
-                # calculate peak flow
-                freq.peakflow.calculate_peak_flow(
-                    mean_slope_pct=pt.shed.avg_slope_pct,
-                    max_flow_length_m=pt.shed.max_fl,
-                    avg_rainfall_cm=freq.avg_rainfall_cm,
-                    basin_area_sqkm=pt.shed.area_sqkm,
-                    avg_cn=pt.shed.avg_cn,
-                    tc_hr=pt.shed.tc_hr
+            for j, freq in enumerate(pt.analytics):
+                peakflow = peakflows[i, j]
+                if numpy.isnan(peakflow):
+                    peakflow = None
+                # instantiate a Runoff dataclass w/ the results. Culvert 
+                # peak-flow is assigned for the crossing as well (later we'll 
+                # calc/reassign if it's part of a multi-culvert crossing)
+                freq.peakflow = runoff.Runoff(
+                    time_of_concentration_hr=tcs[i],
+                    culvert_peakflow_m3s=peakflow,
+                    crossing_peakflow_m3s=peakflow
                 )
-
-                # assign culvert peak-flow for the crossing as well
-                # (later we'll calc/reassign if it's part of a multi-culvert crossing)
-                freq.peakflow.crossing_peakflow_m3s = freq.peakflow.culvert_peakflow_m3s
                 
-                # OVERFLOW
-                # instantiate the Overflow dataclass
-                freq.overflow = overflow.Overflow()
-                # if capacity was calculated, calculate overflow
-                if all([
-                    pt.capacity.culvert_capacity is not None,
-                    freq.peakflow.culvert_peakflow_m3s is not None
-                ]):
-                    # calculate overflow at the single culvert
-                    freq.overflow.calculate_overflow(
-                        culvert_capacity=pt.capacity.culvert_capacity,
-                        peak_flow=freq.peakflow.culvert_peakflow_m3s
-                    )
-                    
-                    # assign culvert overflow for the crossing as well.
-                    # (later we'll calc/reassign if it's part of a multi-crossing)
-                    freq.overflow.crossing_overflow_m3s = freq.overflow.culvert_overflow_m3s
+                # instantiate the Overflow dataclass w/ the culvert overflow,
+                # if capacity and peak flow were calculated. Culvert overflow 
+                # is assigned for the crossing as well (later we'll calc/
+                # reassign if it's part of a multi-crossing)
+                culvert_overflow = overflows[i, j]
+                if numpy.isnan(culvert_overflow):
+                    culvert_overflow = None
+                freq.overflow = overflow.Overflow(
+                    culvert_overflow_m3s=culvert_overflow,
+                    crossing_overflow_m3s=culvert_overflow
+                )
 
-        
         # ----------------------------------------------------------------------
         # create a list of group_ids for the multi-culvert crossings
         multiculvert_crossing_group_ids = [
@@ -767,7 +837,7 @@ class CulvertCapacity(WorkflowManager):
 
         # import and unpack the data structure
         t = etl\
-            .fromdicts([DrainItPointSchema(partial=True).dump(pt) for pt in self.config.points])\
+            .fromdicts([get_schema(DrainItPoint).dump(pt) for pt in self.config.points])\
             .addrownumbers(field='oid')\
             .cutout(*['naacc', 'raw', 'notes'])\
             .convert('validation_errors', lambda d: "; ".join(['{0} ({1})'.format(k, ",".join([i for i in v])) for k,v in d.items()]))\
@@ -793,7 +863,7 @@ class CulvertCapacity(WorkflowManager):
         
         # create a feature class from the table
         self.gp.msg(f"saving output points to {self.config.output_points_filepath}")
-        self.gp.create_geodata_from_petl_table(
+        self.gp.create_geodata_from_petl_table_in_bulk(
             petl_table=t3, 
             x_column='lng', 
             y_column='lat', 
@@ -821,7 +891,7 @@ class CulvertCapacity(WorkflowManager):
             slope_raster=self.config.raster_slope_filepath,
             flow_length_raster=self.config.raster_flowlen_filepath,
             curve_number_raster=self.config.raster_curvenumber_filepath,
-            precip_src_config=RainfallRasterConfigSchema().dump(self.config.precip_src_config),
+            precip_src_config=get_schema(RainfallRasterConfig).dump(self.config.precip_src_config),
             out_shed_polygons=self.config.output_sheds_filepath,
             out_shed_polygons_simplify=self.config.sheds_simplify,
             override_skip=False, # will run regardless of validation,
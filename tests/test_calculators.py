@@ -1,7 +1,8 @@
 import json
 from pathlib import Path
 import zipfile
-from math import isclose
+from math import isclose, isnan
+from collections import OrderedDict
 from dataclasses import asdict
 
 import pytest
@@ -15,7 +16,8 @@ from src.drainit import utils
 from src.drainit.calculators import (
     runoff, 
     capacity, 
-    overflow
+    overflow,
+    pipeline
 )
 
 pp = utils.pretty_print
@@ -55,9 +57,176 @@ class TestCalculators:
         print(capacity_args, c)
         assert True
 
+    def test_capacity_batch(self):
+        # culvert_area_sqm, head_over_invert, culvert_depth_m, slope_rr, coefficient_slope, coefficient_y, coefficient_c
+        culverts = [
+            [4.682, 2.225, 1.92, 0.009, -0.5, 0.87, 0.038],
+            [0.164, 0.914, 0.457, 0.006, -0.5, 0.54, 0.055],
+            [0.353, 1.89, 0.671, 0.07, -0.5, 0.69, 0.032],
+            [0.353, 0.1, 0.671, 0.07, -0.5, 0.69, 0.032], # negative radicand
+            [0.353, 1.89, 0, 0.07, -0.5, 0.69, 0.032], # zero depth
+            [0.353, None, 0.671, 0.07, -0.5, 0.69, 0.032], # missing head
+        ]
+        calcd = capacity.calc_culvert_capacity_batch(*[list(col) for col in zip(*culverts)])
+        assert calcd.shape == (len(culverts),)
+        for c, args in zip(calcd, culverts):
+            expected = capacity.calc_culvert_capacity(*args)
+            if expected is None:
+                assert isnan(c)
+            else:
+                assert isclose(c, expected, rel_tol=1e-12)
+
+    def test_capacity_array(self):
+        caps = [
+            capacity.Capacity(culvert_area_sqm=4.682, head_over_invert=2.225, culvert_depth_m=1.92, slope_rr=0.009, coefficient_y=0.87, coefficient_c=0.038),
+            capacity.Capacity(culvert_area_sqm=0.164, head_over_invert=0.914, culvert_depth_m=0.457, slope_rr=0.006, coefficient_y=0.54, coefficient_c=0.055),
+            capacity.Capacity(culvert_area_sqm=0.353, culvert_depth_m=0.671, slope_rr=0.07), # missing head
+        ]
+        capacity_array = capacity.CapacityArray(caps)
+        assert len(capacity_array) == 3
+        assert isnan(capacity_array.head_over_invert[2])
+        capacity_array.calculate()
+        capacity_array.scatter_back(caps)
+        for c in caps:
+            expected = capacity.Capacity(**{f: getattr(c, f) for f in capacity.CAPACITY_NUMERIC_NAMES}).calculate()
+            assert c.culvert_capacity == expected or isclose(c.culvert_capacity, expected, rel_tol=1e-12)
+
+    def test_runoff_batch(self):
+        # (avg_rainfall_cm, basin_area_sqkm, avg_cn, tc_hr)
+        basins = [
+            ([5.2, 7.9, 11.4], 2.5, 72.0, 0.8),
+            ([5.2, 7.9, 11.4], 0.4, 0, 0.3), # no curve number: no peak flow
+            ([0.2, 0.5, 9.0], 1.1, 55.0, 1.6), # rainfall below abstraction
+        ]
+        calcd_pf, calcd_tc = runoff.peak_flow_calculator_batch(
+            avg_rainfall_cm=[b[0] for b in basins],
+            basin_area_sqkm=[b[1] for b in basins],
+            avg_cn=[b[2] for b in basins],
+            tc_hr=[b[3] for b in basins]
+        )
+        assert calcd_pf.shape == (3, 3)
+        assert list(calcd_tc) == [b[3] for b in basins]
+        for i, (rainfall, area, cn, tc) in enumerate(basins):
+            for j, p in enumerate(rainfall):
+                expected_pf, _ = runoff.peak_flow_calculator(None, None, p, area, cn, tc)
+                if expected_pf is None:
+                    assert isnan(calcd_pf[i, j])
+                else:
+                    assert isclose(calcd_pf[i, j], expected_pf, rel_tol=1e-9)
+
+    def test_runoff_batch_tc(self):
+        # (mean_slope_pct, max_flow_length_m, avg_rainfall_cm, basin_area_sqkm, avg_cn, tc_hr)
+        basins = [
+            (12.0, 1850.0, [5.2, 7.9, 11.4], 2.5, 72.0, None), # tc calculated
+            (0, 900.0, [5.2, 7.9, 11.4], 0.4, 81.0, None), # tc calculated w/ min. slope
+            (12.0, 1850.0, [5.2, 7.9, 11.4], 2.5, 72.0, 0.8), # tc provided
+        ]
+        calcd_pf, calcd_tc = runoff.peak_flow_calculator_batch(
+            avg_rainfall_cm=[b[2] for b in basins],
+            basin_area_sqkm=[b[3] for b in basins],
+            avg_cn=[b[4] for b in basins],
+            tc_hr=[b[5] for b in basins],
+            mean_slope_pct=[b[0] for b in basins],
+            max_flow_length_m=[b[1] for b in basins]
+        )
+        for i, (slope, fl, rainfall, area, cn, tc) in enumerate(basins):
+            for j, p in enumerate(rainfall):
+                expected_pf, expected_tc = runoff.peak_flow_calculator(slope, fl, p, area, cn, tc)
+                assert isclose(calcd_tc[i], expected_tc, rel_tol=1e-12)
+                assert isclose(calcd_pf[i, j], expected_pf, rel_tol=1e-9)
+
+    def test_runoff_via_precip_table(self):
+        precip_table = OrderedDict(zip(
+            ["P1", "P2", "P5", "P10", "P25", "P50", "P100", "P200", "P500"],
+            [0.5, 5.2, 6.4, 7.9, 9.3, 11.4, 13.0, 15.1, 17.8]
+        ))
+        calcd_pf = runoff.peak_flow_calculator_via_precip_table(2.5, 0.8, 72.0, precip_table)
+        assert list(calcd_pf.keys()) == list(precip_table.keys())
+        # matches the rain ratio method 2 calculation
+        expected_pf, _ = runoff.peak_flow_calculator_batch(
+            avg_rainfall_cm=[list(precip_table.values())],
+            basin_area_sqkm=[2.5],
+            avg_cn=[72.0],
+            tc_hr=[0.8],
+            rain_ratio_method=1
+        )
+        for calcd, expected in zip(calcd_pf.values(), expected_pf[0]):
+            if isnan(expected): # rainfall below abstraction
+                assert calcd == 0
+            else:
+                assert isclose(calcd, expected, rel_tol=1e-12)
+
+    def test_overflow_batch(self):
+        capacities = [2.0, float("nan")]
+        peak_flows = [[1.5, 2.5, float("nan")], [1.0, 2.0, 3.0]]
+        calcd = overflow.overflow_batch(capacities, peak_flows)
+        assert calcd.shape == (2, 3)
+        assert list(calcd[0, :2]) == [
+            overflow.culvert_overflow_calculator(2.0, 1.5), 
+            overflow.culvert_overflow_calculator(2.0, 2.5)
+        ]
+        assert isnan(calcd[0, 2])
+        assert all(isnan(v) for v in calcd[1])
+
+    def test_max_return(self):
+        freqs = ["1", "2", "5", "10", "25", "50", "100", "200", "500", "1000"]
+        # frequencies compare as numbers, not strings
+        assert overflow.max_return_calculator([3, 2, 1, 0.5, 0.2, 0.1, 0.1, 0.1, 0.1, 0.1], freqs) == 1000
+        assert overflow.max_return_calculator([3, 2, 1, 0.5, -0.2, None, -1, -1, -1, -1], freqs) == 10
+        assert overflow.max_return_calculator([-1, None], freqs) == 0
+        assert overflow.max_return_calculator([], freqs) == 0
+        calcd = overflow.max_return_calculator_batch(
+            [[3, 2, 1, 0.5, 0.2], [3, 2, 1, 0.5, -0.2], [-1, float("nan"), -1, -1, -1]], 
+            freqs[:5]
+        )
+        assert list(calcd) == [25, 10, 0]
+
+    def test_pipeline(self):
+        freqs = ["1", "2", "5"]
+        rainfall = [[5.2, 7.9, 11.4], [5.2, 7.9, 11.4]]
+        peak_flow, tc, ovf, max_return = pipeline.evaluate(
+            culvert_capacity=[50.0, None],
+            avg_rainfall_cm=rainfall,
+            basin_area_sqkm=[2.5, 2.5],
+            avg_cn=[72.0, 72.0],
+            tc_hr=[0.8, 0.8],
+            frequencies=freqs
+        )
+        for j, p in enumerate(rainfall[0]):
+            expected_pf, _ = runoff.peak_flow_calculator(None, None, p, 2.5, 72.0, 0.8)
+            assert isclose(peak_flow[0, j], expected_pf, rel_tol=1e-9)
+            assert isclose(ovf[0, j], 50.0 - expected_pf, rel_tol=1e-9)
+        # no capacity: no overflow or max return
+        assert all(isnan(v) for v in ovf[1])
+        expected_max_return = overflow.max_return_calculator(list(ovf[0]), freqs)
+        assert list(max_return) == [expected_max_return, 0]
+
     # def test_overflow(self):
     #     overflow.calc_overflow_for_frequency()
 
+    def test_runoff_zero_tc(self):
+        # a zero max flow length gives a zero time of concentration; peak
+        # flow is NaN, with or without numba
+        pf, tc = runoff.peak_flow_calculator(5, 0, 10.0, 1.0, 70, None)
+        assert tc == 0.0
+        assert isnan(pf)
+        # the plain Python kernel (what runs without numba)
+        kernel = runoff._peak_flow_via_rain_ratio_method1
+        py_kernel = getattr(kernel, '__wrapped__', getattr(kernel, 'py_func', kernel))
+        assert isnan(py_kernel(10.0, 1.0, 70.0, 0.0))
+        assert isnan(kernel(10.0, 1.0, 70.0, 0.0))
+
+    def test_json_nan_roundtrip(self, tmp_path):
+        # configs can hold NaN peak flows; they need to read back as NaN
+        # whether or not orjson is installed
+        fp = tmp_path / 'config.json'
+        utils.write_json({"peakflow": float('nan'), "cn": 70.0}, fp)
+        assert fp.read_text() == json.dumps({"peakflow": float('nan'), "cn": 70.0})
+        c = utils.read_json(fp)
+        assert isnan(c["peakflow"])
+        assert c["cn"] == 70.0
+        assert isnan(utils.parse_json('{"v": NaN}')["v"])
+
 
 class TestCapacityCalc:
 
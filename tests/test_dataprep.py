@@ -19,11 +19,20 @@ from src.drainit.calculators import (
 pp = utils.pretty_print
 
 
-# class TestWorkflowManagement:
+class TestWorkflowManagement:
 
-#     def test_workflow_config_init(self):
-#         w = workflows.WorkflowManager()
-#         assert w is not None
+    def test_workflow_config_init(self):
+        w = workflows.WorkflowManager()
+        assert w is not None
+
+    def test_workflows_all(self):
+        for name in workflows.__all__:
+            assert isinstance(getattr(workflows, name), type)
+
+    def test_curvenumbermaker_init(self):
+        w = workflows.CurveNumberMaker()
+        assert w.config is not None
+        assert w.gp is not None
 
  
 class TestRainfallETL:
@@ -173,4 +182,35 @@ class TestNaaccETL:
         )
         t = results.naacc_table # petl table
 
-        assert True
\ No newline at end of file
+        assert True
+
+class TestGeodataWriters:
+
+    def test_bulk_and_row_writers_create_same_fields(self):
+        """the bulk NumPy writer and the row-by-row writer should produce 
+        the same schema for the same table.
+        """
+        gp = workflows.WorkflowManager().gp
+        t = [
+            ['uid', 'x', 'y', 'avg_cn', 'count', 'include', 'validation_errors'],
+            ['a', -73.946772, 42.324812, 70.5, 1, True, '{}'],
+            ['b', -73.948035, 42.326571, 71.5, 2, False, '{}']
+        ]
+        field_types_lookup = {
+            'uid': str, 'x': float, 'y': float, 'avg_cn': float, 
+            'count': int, 'include': bool, 'validation_errors': str
+        }
+        # make sure the bulk writer doesn't fall back to the row-by-row one
+        assert gp.create_numpy_array_from_petl_table(t, 'x', 'y', field_types_lookup) is not None
+
+        bulk = gp.create_geodata_from_petl_table_in_bulk(t, 'x', 'y', field_types_lookup=field_types_lookup)
+        rows = gp.create_geodata_from_petl_table(t, 'x', 'y', field_types_lookup=field_types_lookup)
+
+        def field_specs(geodata):
+            return {
+                f['name']: (f['type'], f.get('length'))
+                for f in geodata['fields']
+            }
+
+        assert field_specs(bulk) == field_specs(rows)
+        assert len(bulk['features']) == len(rows['features']) == 2